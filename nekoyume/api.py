@@ -2,20 +2,25 @@ import datetime
 import os
 
 from flask import Blueprint, jsonify, request
-from requests import get
-from requests.exceptions import ConnectionError
+from requests.exceptions import ConnectionError, Timeout
 from sqlalchemy.exc import IntegrityError
 
-from .block import Block
+from .block import HEADERS_LIMIT, LOCATOR_LIMIT, Block, CreatorCount
 from .broadcast import (
+    BROADCAST_LIMIT,
+    POST_BLOCKS_BATCH_ENDPOINT,
     POST_BLOCK_ENDPOINT,
+    POST_MOVES_BATCH_ENDPOINT,
     POST_MOVE_ENDPOINT,
     POST_NODE_ENDPOINT,
 )
-from .move import Move, get_my_public_url
+from .exc import InvalidBlockError, InvalidMoveError
+from .move import Move, get_my_public_url, verify_moves
 from .node import Node
 from .orm import db
-from .tasks import block_broadcast, move_broadcast
+from .peer import get
+from .tasks import block_broadcast, block_sync, relay_move
+from .user import AvatarSnapshot
 
 
 api = Blueprint('api', __name__, template_folder='templates')
@@ -68,7 +73,7 @@ def post_node():
         db.session.add(node)
     try:
         response = get(f'{node.url}/ping')
-    except ConnectionError:
+    except (ConnectionError, Timeout):
         db.session.rollback()
         return jsonify(
             result='failed',
@@ -105,6 +110,34 @@ def get_blocks():
                            for b in blocks])
 
 
+@api.route(Node.get_headers_endpoint, methods=['GET'])
+def get_headers():
+    from_ = request.values.get('from', 1, type=int)
+    to = request.values.get('to', type=int)
+    blocks = Block.query.filter(Block.id >= from_)
+    if to is not None:
+        blocks = blocks.filter(Block.id <= to)
+    blocks = blocks.order_by(Block.id.asc()).limit(HEADERS_LIMIT)
+    return jsonify(headers=[b.serialize(use_bencode=False,
+                                        include_suffix=True,
+                                        include_hash=True)
+                            for b in blocks])
+
+
+@api.route(Node.locate_endpoint, methods=['POST'])
+def locate_block():
+    payload = request.get_json()
+    try:
+        locator = payload['locator'][:LOCATOR_LIMIT]
+    except (KeyError, TypeError):
+        return jsonify(result='failed',
+                       message='Invalid parameter.'), 400
+    block = Block.query.filter(
+        Block.hash.in_(locator)
+    ).order_by(Block.id.desc()).first()
+    return jsonify(block_id=block.id if block else 0)
+
+
 @api.route('/blocks/<string:block_hash>')
 def get_block_by_hash(block_hash):
     block = Block.query.filter_by(hash=block_hash).first()
@@ -153,9 +186,7 @@ def post_block():
                        message="empty block."), 400
 
     if not last_block and new_block['id'] != 1:
-        Block.sync(
-            Node.query.order_by(
-                Node.last_connected_at.desc()).first())
+        block_sync.delay()
         return jsonify(result='failed',
                        message="new block isn't our next block."), 403
 
@@ -163,9 +194,7 @@ def post_block():
        (new_block['id'] != last_block.id + 1 or
        new_block['prev_hash'] != last_block.hash)):
         if new_block['id'] > last_block.id + 1:
-            Block.sync(
-                Node.query.order_by(
-                    Node.last_connected_at.desc()).first())
+            block_sync.delay()
         return jsonify(result='failed',
                        block_id=last_block.id,
                        message="new block isn't our next block."), 403
@@ -183,6 +212,7 @@ def post_block():
     if not block.valid:
         return jsonify(result='failed',
                        message="new block isn't valid."), 400
+    block.creator_count = CreatorCount.create(block)
 
     db.session.add(block)
     try:
@@ -190,6 +220,7 @@ def post_block():
     except IntegrityError:
         return jsonify(result='failed',
                        message="This node already has this block."), 400
+    AvatarSnapshot.materialize(block)
     sent_node = Node()
     if 'sent_node' in new_block:
         sent_node.url = new_block['sent_node']
@@ -201,6 +232,58 @@ def post_block():
     return jsonify(result='success')
 
 
+@api.route(POST_BLOCKS_BATCH_ENDPOINT, methods=['POST'])
+def post_blocks():
+    new_blocks = request.get_json()
+    if not new_blocks or not isinstance(new_blocks, list):
+        return jsonify(result='failed',
+                       message="empty blocks."), 400
+    # Lagging nodes are caught up BROADCAST_LIMIT blocks at a time.
+    if len(new_blocks) > BROADCAST_LIMIT:
+        return jsonify(result='failed',
+                       message="too many blocks."), 400
+    last_block = Block.query.order_by(Block.id.desc()).first()
+    last_block_id = last_block.id if last_block else 0
+    try:
+        new_blocks = [b for b in new_blocks if b['id'] > last_block_id]
+        follows = not new_blocks or (
+            new_blocks[0]['id'] == last_block_id + 1 and
+            (not last_block or new_blocks[0]['prev_hash'] == last_block.hash)
+        )
+    except (KeyError, TypeError):
+        return jsonify(result='failed',
+                       message='Invalid parameter.'), 400
+    if not new_blocks:
+        return jsonify(result='success')
+
+    if not follows:
+        return jsonify(result='failed',
+                       block_id=last_block_id,
+                       message="new blocks don't follow our last block."), 403
+
+    try:
+        extended = Block.extend_chain(new_blocks)
+    except (KeyError, TypeError, ValueError):
+        db.session.rollback()
+        return jsonify(result='failed',
+                       message='Invalid parameter.'), 400
+    except InvalidMoveError:
+        return jsonify(result='failed',
+                       message="new blocks have invalid moves."), 400
+    except InvalidBlockError:
+        return jsonify(result='failed',
+                       message="new blocks aren't valid."), 400
+    if not extended:
+        return jsonify(result='failed',
+                       message="This node already has these blocks."), 400
+    block_broadcast.delay(
+        new_blocks[-1]['id'],
+        sent_node_url=None,
+        my_node_url=f'{request.scheme}://{request.host}'
+    )
+    return jsonify(result='success')
+
+
 @api.route(POST_MOVE_ENDPOINT, methods=['POST'])
 def post_move():
     new_move = request.get_json()
@@ -226,7 +309,7 @@ def post_move():
     if 'sent_node' in new_move:
         sent_node.url = new_move['sent_node']
 
-    move_broadcast.delay(
+    relay_move(
         move.id,
         sent_node_url=sent_node.url,
         my_node_url=f'{request.scheme}://{request.host}'
@@ -234,6 +317,53 @@ def post_move():
     return jsonify(result='success')
 
 
+@api.route(POST_MOVES_BATCH_ENDPOINT, methods=['POST'])
+def post_moves():
+    bundle = request.get_json()
+    try:
+        if not bundle or not isinstance(bundle.get('moves'), list):
+            return jsonify(result='failed',
+                           message="empty moves."), 400
+        ids = [m['id'] for m in bundle['moves']]
+        if not all(isinstance(id_, str) for id_ in ids):
+            raise TypeError
+        stored = {
+            id_
+            for id_, in db.session.query(Move.id).filter(Move.id.in_(ids))
+        }
+        moves = [Move.deserialize(m) for m in bundle['moves']
+                 if m['id'] not in stored]
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return jsonify(result='failed',
+                       message='Invalid parameter.'), 400
+    accepted = []
+    invalid = []
+    for move, valid in zip(moves, verify_moves(moves)):
+        if valid:
+            db.session.add(move)
+            accepted.append(move.id)
+        else:
+            invalid.append(move.id)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(result='failed',
+                       message="This node already has these moves."), 400
+    for move_id in accepted:
+        relay_move(
+            move_id,
+            sent_node_url=bundle.get('sent_node'),
+            my_node_url=f'{request.scheme}://{request.host}'
+        )
+    if invalid:
+        return jsonify(result='failed',
+                       accepted=accepted,
+                       invalid=invalid,
+                       message="some of moves aren't valid."), 400
+    return jsonify(result='success', accepted=accepted)
+
+
 @api.route('/version/')
 def version():
     return jsonify(os.environ.get('_COMMIT_HASH', ''))
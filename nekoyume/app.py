@@ -65,28 +65,33 @@ def create_app():
             'CELERY_BROKER_URL', 'sqla+sqlite:///yume_broker.db'),
         CELERY_RESULT_BACKEND=os.environ.get(
             'CELERY_RESULT_BACKEND', 'db+sqlite:///yume_reuslt.db'))
+
+    cache_type = os.environ.get('CACHE_TYPE', 'filesystem')
+    if cache_type == 'redis':
+        # Redis bounds its size by itself; run one apart from the Celery
+        # broker with maxmemory and the allkeys-lru policy, to evict least
+        # recently used entries.
+        cache_config = {
+            'CACHE_TYPE': cache_type,
+            'CACHE_REDIS_URL': os.environ.get(
+                'REDIS_URL', 'redis://localhost:6379'
+            ),
+        }
+    else:
+        if cache_type == 'filesystem':
+            cache_type = 'nekoyume.cache.lru_filesystem'
+        cache_config = {
+            'CACHE_TYPE': cache_type,
+            'CACHE_DIR': os.environ.get('CACHE_DIR', '.yumecache'),
+            'CACHE_THRESHOLD': int(os.environ.get('CACHE_THRESHOLD', 10000)),
+        }
+    cache.init_app(app, cache_config)
     return app
 
 
 app = create_app()
 cel = make_celery(app)
 
-cache_type = os.environ.get('CACHE_TYPE', 'filesystem')
-if cache_type == 'redis':
-    cache_config = {
-        'CACHE_TYPE': cache_type,
-        'CACHE_REDIS_URL': os.environ.get(
-            'REDIS_URL', 'redis://localhost:6379'
-        ),
-    }
-else:
-    cache_config = {
-        'CACHE_TYPE': cache_type,
-        'CACHE_DIR': os.environ.get('CACHE_DIR', '.yumecache'),
-    }
-
-cache.init_app(app, cache_config)
-
 
 def run():
     from gunicorn.app import wsgiapp
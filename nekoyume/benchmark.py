@@ -0,0 +1,117 @@
+"""
+Benchmark
+=========
+
+`benchmark.py` measures the throughput of :mod:`nekoyume.hashcash`, to catch
+performance regressions between releases.  Challenges are generated from
+a seed, so every run with the same parameters mints the same suffixes:
+
+    >>> result = bench_mint(bits=8, challenge_size=64, rounds=2)
+    >>> result['attempts'] == bench_mint(8, 64, rounds=2)['attempts']
+    True
+
+"""
+import multiprocessing
+import platform
+import random
+import sys
+import time
+import typing
+
+from pkg_resources import DistributionNotFound, get_distribution
+
+from .hashcash import check, _mint
+
+
+def generate_challenges(size: int, rounds: int,
+                        seed: int=0) -> typing.List[bytes]:
+    """Generate random challenges of the given size reproducibly."""
+    rand = random.Random(f'{seed}/{size}')
+    return [bytes(rand.getrandbits(8) for _ in range(size))
+            for _ in range(rounds)]
+
+
+def bench_mint(bits: int, challenge_size: int, workers: int=1,
+               rounds: int=3, seed: int=0) -> typing.Dict[str, typing.Any]:
+    """
+    Measure :func:`nekoyume.hashcash._mint()`.
+
+    :param           bits: difficulty bits to mint.
+    :param challenge_size: length of challenges in bytes.
+    :param        workers: number of processes to mint.
+    :param         rounds: number of challenges to mint.
+    :param           seed: seed to generate challenges.
+    :return: a result that consists of the parameters, number of attempts
+             (the counter of each answer), elapsed seconds, hashes per
+             second, the average seconds to find an answer and seconds to
+             start worker processes, which aren't counted in the others.
+    """
+    attempts = 0
+    seconds = 0.0
+    startup_seconds = 0.0
+    pool = None
+    if workers > 1:
+        started_at = time.perf_counter()
+        pool = multiprocessing.Pool(workers)
+        # Wait until every worker process is ready.
+        pool.map(abs, range(workers), chunksize=1)
+        startup_seconds = time.perf_counter() - started_at
+    try:
+        for challenge in generate_challenges(challenge_size, rounds, seed):
+            started_at = time.perf_counter()
+            answer = _mint(challenge, bits, workers=workers, pool=pool)
+            seconds += time.perf_counter() - started_at
+            attempts += int.from_bytes(answer, sys.byteorder)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return {
+        'benchmark': 'mint',
+        'bits': bits,
+        'challenge_size': challenge_size,
+        'workers': workers,
+        'rounds': rounds,
+        'attempts': attempts,
+        'seconds': seconds,
+        'hashes_per_second': attempts / seconds if seconds else None,
+        'time_to_solution': seconds / rounds,
+        'startup_seconds': startup_seconds,
+    }
+
+
+def bench_check(challenge_size: int, number: int=100000,
+                seed: int=0) -> typing.Dict[str, typing.Any]:
+    """
+    Measure :func:`nekoyume.hashcash.check()`.
+
+    :param challenge_size: length of stamps in bytes.
+    :param         number: number of stamps to check.
+    :param           seed: seed to generate stamps.
+    """
+    stamps = generate_challenges(challenge_size, min(number, 1000), seed)
+    started_at = time.perf_counter()
+    for i in range(number):
+        check(stamps[i % len(stamps)], bits=8)
+    seconds = time.perf_counter() - started_at
+    return {
+        'benchmark': 'check',
+        'challenge_size': challenge_size,
+        'number': number,
+        'seconds': seconds,
+        'hashes_per_second': number / seconds if seconds else None,
+    }
+
+
+def environment() -> typing.Dict[str, typing.Optional[str]]:
+    """Describe where benchmarks run, to compare results fairly."""
+    try:
+        version = get_distribution('nekoyume').version
+    except DistributionNotFound:
+        version = None
+    return {
+        'nekoyume': version,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+    }
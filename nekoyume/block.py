@@ -1,10 +1,27 @@
+import collections
+import concurrent.futures
+import contextlib
 import datetime
+import functools
 import hashlib
+import itertools
 import os
-from typing import Callable, Optional, Type, Union
+import threading
+from typing import (
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 from bencode import bencode
-from requests import get
 from requests.exceptions import ConnectionError, Timeout
 from sqlalchemy.exc import IntegrityError
 from typeguard import typechecked
@@ -15,10 +32,12 @@ from .exc import (
     InvalidMoveError,
     NodeUnavailable,
 )
+from .move import Move, verify_moves
 from .node import Node
 from .orm import db
-from .user import User
-from .util import deserialize_datetime
+from .peer import PEER_BULK_TIMEOUT, PEER_TIMEOUT, get, post
+from .user import AvatarSnapshot, User
+from .util import deserialize_datetime, prefetch
 
 
 MIN_BLOCK_INTERVAL = \
@@ -26,6 +45,25 @@ MIN_BLOCK_INTERVAL = \
 MAX_BLOCK_INTERVAL = \
     datetime.timedelta(seconds=int(os.environ.get('MAX_BLOCK_INTERVAL', 15)))
 PROTOCOL_VERSION: int = 2
+#: Number of the previous blocks to adjust difficulty.
+DIFFICULTY_WINDOW: int = 10
+#: Number of blocks to fetch at once while syncing.
+SYNC_PAGE_SIZE: int = 1000
+#: Number of peers to download blocks from at once while syncing.
+SYNC_PEERS: int = int(os.environ.get('SYNC_PEERS', 4))
+#: Whether to sync block headers before their moves by default.
+SYNC_HEADERS_FIRST: bool = \
+    os.environ.get('SYNC_HEADERS_FIRST', '').lower() in ('1', 'true', 'yes')
+#: Number of the last blocks to put in a locator before spacing them.
+LOCATOR_DENSE: int = 10
+#: Maximum number of hashes in a locator to look up.
+LOCATOR_LIMIT: int = 100
+#: Maximum number of block headers to serve at once.
+HEADERS_LIMIT: int = 5000
+#: Number of pages to keep ahead of the slower stage while syncing.
+SYNC_QUEUE_SIZE: int = int(os.environ.get('SYNC_QUEUE_SIZE', 2))
+#: Seconds between checks of the chain tip while mining.
+TIP_POLL_INTERVAL: float = float(os.environ.get('TIP_POLL_INTERVAL', 1))
 
 
 class Block(db.Model):
@@ -62,6 +100,10 @@ class Block(db.Model):
         db.CheckConstraint((id == 1) | (difficulty > 0)),
     )
 
+    #: how many blocks the creator has created until this block
+    creator_count = db.relationship('CreatorCount', uselist=False,
+                                    cascade='all, delete-orphan')
+
     @classmethod
     def deserialize(cls, serialized: dict) -> 'Block':
         return cls(
@@ -79,23 +121,60 @@ class Block(db.Model):
     @property
     def valid(self) -> bool:
         """Check if this object is valid or not"""
-        stamp = self.serialize() + self.suffix
-        valid = (self.hash == hashlib.sha256(stamp).hexdigest())
-        valid = valid and hashcash.check(stamp, self.suffix, self.difficulty)
+        return self.validate()
+
+    def validate(self, prev_blocks: Iterable['Block']=(),
+                 check_moves: bool=True) -> bool:
+        """
+        Check if this object is valid or not.
+
+        :param prev_blocks: the previous blocks of this block, e.g., a
+                            :class:`collections.deque` of the last
+                            :const:`DIFFICULTY_WINDOW` blocks maintained while
+                            iterating a chain.  blocks not in it are queried.
+        :param check_moves: check if you want to verify linked moves.
+                            turn it off if they were verified already.
+        """
+        valid = self.validate_header(prev_blocks)
 
         valid = valid and (
             len(self.serialize(True, True, True, True)) <= Block.size_limit
         )
 
+        valid = valid and self.root_hash == hashlib.sha256(
+            ''.join(sorted((m.id for m in self.moves))).encode('utf-8')
+        ).hexdigest()
+
+        if valid and check_moves:
+            valid = all(verify_moves(self.moves))
+        return valid
+
+    def validate_header(self, prev_blocks: Iterable['Block']=()) -> bool:
+        """
+        Check if this object is valid or not without its moves, i.e., its
+        hash, hashcash, link to the previous block and difficulty.
+
+        :param prev_blocks: the previous blocks of this block.
+                            see also :meth:`validate`.
+        """
+        stamp = self.serialize() + self.suffix
+        valid = (self.hash == hashlib.sha256(stamp).hexdigest())
+        valid = valid and hashcash.check(stamp, self.suffix, self.difficulty)
+
         if self.id > 1:
-            prev_block = Block.query.get(self.id - 1)
+            window = {block.id: block for block in prev_blocks}
+            prev_block = (
+                window.get(self.id - 1) or Block.query.get(self.id - 1)
+            )
             if not prev_block:
                 return False
             valid = valid and self.prev_hash == prev_block.hash
 
             difficulty = prev_block.difficulty
-            difficulty_check_block = Block.query.get(
-                max(1, self.id - 10)
+            difficulty_check_id = max(1, self.id - DIFFICULTY_WINDOW)
+            difficulty_check_block = (
+                window.get(difficulty_check_id) or
+                Block.query.get(difficulty_check_id)
             )
             avg_timedelta = (
                 (self.created_at - difficulty_check_block.created_at) /
@@ -110,13 +189,6 @@ class Block(db.Model):
         else:
             valid = valid and self.prev_hash is None
             valid = valid and self.difficulty == 0
-
-        valid = valid and self.root_hash == hashlib.sha256(
-            ''.join(sorted((m.id for m in self.moves))).encode('utf-8')
-        ).hexdigest()
-
-        for move in self.moves:
-            valid = valid and move.valid
         return valid
 
     def serialize(self,
@@ -162,15 +234,24 @@ class Block(db.Model):
         return serialized
 
     @classmethod
-    def sync(cls, node: Node=None, session=db.session, echo=None) -> bool:
+    def sync(cls, node: Node=None, session=db.session, echo=None,
+             headers_first: bool=SYNC_HEADERS_FIRST,
+             parallel: bool=True) -> bool:
         """
         Sync blockchain with other node.
 
-        :param node: sync target :class:`nekoyume.node.Node`.
+        :param          node: sync target :class:`nekoyume.node.Node`.
+        :param headers_first: check if you want to download and validate
+                              block headers before their moves, to reject
+                              an invalid chain before replacing blocks.
+        :param      parallel: check if you want to verify moves in a
+                              process pool.  It should be :const:`False`
+                              where processes can't be forked, e.g.,
+                              in Celery workers.
         """
-        from .move import Move
         if not node:
-            nodes = Node.query.order_by(
+            # Nodes being backed off from are skipped.
+            nodes = Node.query.filter(~Node.down).order_by(
                 Node.last_connected_at.desc()
             ).limit(10)
         else:
@@ -180,20 +261,33 @@ class Block(db.Model):
             return False
 
         node_last_block = None
+        tips = []
         for n in nodes:
             try:
-                response = get(
-                    f"{n.url}{Node.get_blocks_endpoint}/last",
-                    timeout=3
-                )
-                if response.status_code != 200:
-                    continue
-                if (not node_last_block or
-                   node_last_block['id'] < response.json()['block']['id']):
-                    node_last_block = response.json()['block']
-                    node = n
-            except (ConnectionError, KeyError, Timeout):
+                response = get(f"{n.url}{Node.get_blocks_endpoint}/last")
+            except (ConnectionError, Timeout):
+                n.record_failure()
+                continue
+            n.record_success(response.elapsed.total_seconds())
+            if response.status_code != 200:
+                continue
+            try:
+                tip = response.json()['block']
+            except (KeyError, ValueError):
                 continue
+            tips.append((n, tip['id']))
+            if not node_last_block or node_last_block['id'] < tip['id']:
+                node_last_block = tip
+                node = n
+        # Faster nodes share more of the download.
+        tips.sort(key=lambda t: t[0].latency or 0)
+        # Peers are read by other threads while pages are written, so they
+        # are detached from the session before their health is committed.
+        peer_nodes = {id(n): Node(url=n.url) for n, _ in tips}
+        tips = [(peer_nodes[id(n)], tip_id) for n, tip_id in tips]
+        if node is not None:
+            node = peer_nodes.get(id(node)) or Node(url=node.url)
+        db.session.commit()
 
         last_block = session.query(Block).order_by(Block.id.desc()).first()
 
@@ -205,20 +299,41 @@ class Block(db.Model):
             return True
 
         if last_block:
-            # TODO: Very hard to understand. fix this easily.
             try:
-                branch_point = find_branch_point(node, session, last_block.id,
-                                                 last_block.id)
-                if branch_point == last_block.id:
-                    branch_point = last_block.id
-                else:
-                    branch_point = find_branch_point(node, session, 0,
-                                                     last_block.id)
-            except NodeUnavailable:
+                branch_point = locate_branch_point(node, session,
+                                                   last_block.id)
+                # Fall back to binary search for nodes without locators.
+                if branch_point is None:
+                    branch_point = find_branch_point(
+                        node, session, last_block.id, last_block.id
+                    ) or find_branch_point(node, session, 0, last_block.id)
+            except (ConnectionError, NodeUnavailable, Timeout):
                 return
         else:
             branch_point = 0
 
+        header_hashes = {}
+        if headers_first:
+            if echo:
+                echo(f'Syncing headers...(from: {branch_point + 1})')
+            try:
+                headers = fetch_headers(node, branch_point + 1,
+                                        node_last_block['id'])
+            except (ConnectionError, NodeUnavailable, Timeout):
+                return False
+            # None means the node doesn't serve headers; sync it as before.
+            if headers is not None:
+                if not validate_headers(headers,
+                                        Block.window(branch_point, session),
+                                        branch_point):
+                    return False
+                #: Our chain is as long as the valid part of theirs.
+                if last_block and \
+                   last_block.id >= branch_point + len(headers):
+                    return True
+                header_hashes = {h.id: h.hash for h in headers}
+
+        AvatarSnapshot.truncate(branch_point, session)
         for block in session.query(Block).filter(Block.id > branch_point):
             for move in block.moves:
                 move.block_id = None
@@ -229,44 +344,46 @@ class Block(db.Model):
         # stale objects can be fetched when validating blocks.
         session.flush()
 
-        from_ = branch_point + 1
-        limit = 1000
-        while True:
-            if echo:
-                echo(f'Syncing blocks...(from: {from_})')
-            response = get(f"{node.url}{Node.get_blocks_endpoint}",
-                           params={'from': from_,
-                                   'to': from_ + limit - 1})
-            if response.status_code != 200:
-                break
-            if len(response.json()['blocks']) == 0:
-                break
-            for new_block in response.json()['blocks']:
-                block = Block.deserialize(new_block)
-
-                for new_move in new_block['moves']:
-                    move = session.query(Move).get(new_move['id'])
-                    if not move:
-                        move = Move.deserialize(new_move, block.id)
-                    if not move.valid:
-                        session.rollback()
-                        raise InvalidMoveError
-                    block.moves.append(move)
-                    session.add(move)
-
-                if not block.valid:
-                    session.rollback()
-                    raise InvalidBlockError
-                session.add(block)
-            if len(response.json()['blocks']) < 1000:
-                break
-            from_ += limit
+        window = collections.deque(
+            Block.window(branch_point, session), maxlen=DIFFICULTY_WINDOW
+        )
+        # Fetching, verifying and writing pages run concurrently as stages
+        # of a pipeline, with bounded queues between them.
+        # The node of the highest tip goes first, and the others having
+        # the same chain share the download with it.
+        peers = [(node, node_last_block['id'])]
+        peers.extend(t for t in tips if t[0] is not node)
+        pages = prefetch(
+            fetch_blocks(peers, branch_point + 1,
+                         window[-1].hash if window else None,
+                         SYNC_PAGE_SIZE, echo),
+            SYNC_QUEUE_SIZE
+        )
+        verified_pages = prefetch(
+            map(functools.partial(verify_blocks, parallel=parallel), pages),
+            SYNC_QUEUE_SIZE
+        )
+        # Our blocks above the branch point are deleted in the same
+        # transaction as the pages replacing them, which isn't committed
+        # until the synced chain gets longer than ours.
+        last_id = last_block.id if last_block else 0
+        synced_id = branch_point
+        with contextlib.closing(verified_pages):
             try:
-                session.commit()
-            except IntegrityError:
+                for page in verified_pages:
+                    synced_id = page[-1][0].id
+                    if not cls._write_blocks(page, window, session,
+                                             header_hashes,
+                                             commit=synced_id > last_id):
+                        return False
+            except (InvalidBlockError, InvalidMoveError):
+                session.rollback()
+                raise
+            except (ConnectionError, NodeUnavailable, Timeout):
+                # Only the deletion of our blocks is rolled back, if the
+                # synced chain didn't get longer than ours.
                 session.rollback()
                 return False
-
         try:
             session.commit()
         except IntegrityError:
@@ -274,6 +391,105 @@ class Block(db.Model):
             return False
         return True
 
+    @classmethod
+    def _write_blocks(cls, page: List[Tuple['Block', List[Move]]],
+                      window: Deque['Block'], session,
+                      header_hashes: Mapping[int, str],
+                      commit: bool=True) -> bool:
+        with session.no_autoflush:
+            for block, moves in page:
+                for move in moves:
+                    move = session.query(Move).get(move.id) or move
+                    block.moves.append(move)
+                    session.add(move)
+        synced_blocks = []
+        for block, _ in page:
+            if block.hash != header_hashes.get(block.id, block.hash):
+                raise InvalidBlockError
+            if not block.validate(window, check_moves=False):
+                raise InvalidBlockError
+            block.creator_count = CreatorCount.create(block, session)
+            session.add(block)
+            synced_blocks.append(block)
+            window.append(block)
+        try:
+            if commit:
+                session.commit()
+            else:
+                session.flush()
+        except IntegrityError:
+            session.rollback()
+            return False
+        for block in synced_blocks:
+            AvatarSnapshot.materialize(block, session, commit=False)
+        if commit:
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+        return True
+
+    @classmethod
+    def extend_chain(cls, serialized_blocks: Sequence[dict],
+                     session=db.session) -> bool:
+        """
+        Validate serialized blocks as a segment of the chain following our
+        last block, and write all of them in a single transaction.
+
+        :param serialized_blocks: serialized blocks in ascending order.
+        :param           session: Database session to write blocks.
+        :return: :const:`False` if some of them are stored already.
+        """
+        page = verify_blocks(serialized_blocks)
+        window = collections.deque(
+            cls.window(page[0][0].id - 1, session), maxlen=DIFFICULTY_WINDOW
+        )
+        try:
+            return cls._write_blocks(page, window, session, {})
+        except InvalidBlockError:
+            session.rollback()
+            raise
+
+    @classmethod
+    def locator(cls, tip_id: int, session=db.session) -> List[str]:
+        """
+        Get hashes of blocks from the given block to the genesis block, at
+        heights spaced exponentially after the last :const:`LOCATOR_DENSE`
+        ones, in descending order.  It lets another node find the highest
+        common block with us in a single request.
+
+        :param  tip_id: id of the first block of the locator.
+        :param session: Database session to get data.
+        """
+        ids = []
+        id_, step = tip_id, 1
+        while id_ > 1:
+            ids.append(id_)
+            if len(ids) >= LOCATOR_DENSE:
+                step *= 2
+            id_ -= step
+        ids.append(1)
+        rows = session.query(cls.hash).filter(
+            cls.id.in_(ids)
+        ).order_by(cls.id.desc())
+        return [hash_ for hash_, in rows]
+
+    @classmethod
+    def window(cls, block_id: int, session=db.session) -> List['Block']:
+        """
+        Get the last :const:`DIFFICULTY_WINDOW` blocks until the given block
+        in ascending order, to validate the following blocks with
+        :meth:`validate`.
+
+        :param block_id: the last block id of the window.
+        :param  session: Database session to get data.
+        """
+        blocks = session.query(cls).filter(
+            cls.id <= block_id
+        ).order_by(cls.id.desc()).limit(DIFFICULTY_WINDOW).all()
+        blocks.reverse()
+        return blocks
+
     @classmethod
     @typechecked
     def create(
@@ -283,8 +499,15 @@ class Block(db.Model):
             commit: bool=True,
             echo: Optional[Callable]=None,
             sleep: Union[int, float]=0.0,
+            workers: int=1,
+            cancel: Optional[threading.Event]=None,
+            deadline: Optional[float]=None,
     ) -> Optional['Block']:
-        """ Create a block. """
+        """
+        Create a block.  It returns :const:`None` if another block of the
+        same height is stored first, or mining is given up by *cancel* or
+        *deadline* (see :func:`nekoyume.hashcash._mint()`).
+        """
         for move in moves:
             if not move.valid:
                 raise InvalidMoveError(move)
@@ -303,7 +526,7 @@ class Block(db.Model):
             block.prev_hash = prev_block.hash
             block.difficulty = prev_block.difficulty
             difficulty_check_block = user.session.query(Block).get(
-                max(1, block.id - 10)
+                max(1, block.id - DIFFICULTY_WINDOW)
             )
             avg_timedelta = (
                 (block.created_at - difficulty_check_block.created_at) /
@@ -325,8 +548,9 @@ class Block(db.Model):
             sleep = 0
 
         block.suffix = hashcash._mint(block.serialize(), bits=block.difficulty,
-                                      sleep=sleep)
-        if user.session.query(Block).get(block.id):
+                                      sleep=sleep, workers=workers,
+                                      cancel=cancel, deadline=deadline)
+        if block.suffix is None or user.session.query(Block).get(block.id):
             return None
         block.hash = hashlib.sha256(
             block.serialize() + block.suffix
@@ -337,6 +561,7 @@ class Block(db.Model):
 
         if not block.valid:
             raise InvalidBlockError
+        block.creator_count = CreatorCount.create(block, user.session)
 
         if commit:
             try:
@@ -344,26 +569,309 @@ class Block(db.Model):
                 user.session.commit()
             except IntegrityError:
                 return None
+            AvatarSnapshot.materialize(block, user.session)
 
         return block
 
 
+class CreatorCount(db.Model):
+    """This object contains how many blocks a creator has created until
+    a block, so that it can be read without counting blocks."""
+
+    __tablename__ = 'creator_count'
+    #: block id
+    block_id = db.Column(db.Integer, db.ForeignKey('block.id'),
+                         primary_key=True)
+    #: block creator's address
+    creator = db.Column(db.String, nullable=False)
+    #: number of blocks the creator has created until the block
+    count = db.Column(db.Integer, nullable=False)
+    __table_args__ = (
+        db.Index('ix_creator_count_creator_block_id', creator, block_id),
+    )
+
+    @classmethod
+    def create(cls, block: Block, session=db.session) -> 'CreatorCount':
+        """
+        count blocks of the given block's creator including it.
+
+        :param   block: new :class:`Block` to count.
+        :param session: Database session to get the previous count.
+        """
+        return cls(
+            block_id=block.id,
+            creator=block.creator,
+            count=cls.get(block.creator, block.id - 1, session) + 1,
+        )
+
+    @classmethod
+    def last(cls, creator: str, block_id: int,
+             session=db.session) -> Optional['CreatorCount']:
+        """
+        get the count at the last block the creator created until the given
+        block.
+
+        :param  creator: block creator's address.
+        :param block_id: last block id to count.
+        :param  session: Database session to get data.
+        """
+        return session.query(cls).filter(
+            cls.creator == creator,
+            cls.block_id <= block_id,
+        ).order_by(cls.block_id.desc()).first()
+
+    @classmethod
+    def get(cls, creator: str, block_id: int, session=db.session) -> int:
+        """
+        get how many blocks the creator has created until the given block.
+
+        :param  creator: block creator's address.
+        :param block_id: last block id to count.
+        :param  session: Database session to get data.
+        """
+        last = cls.last(creator, block_id, session)
+        return last.count if last else 0
+
+
+def watch_tip(height: int, cancel: threading.Event, session=db.session,
+              interval: float=TIP_POLL_INTERVAL) -> threading.Thread:
+    """
+    Start a thread to set *cancel* once a block of the given height is
+    stored, e.g., received from another node while mining the block.
+    The thread stops when *cancel* is set.
+
+    :param   height: id of the block being mined.
+    :param   cancel: event to pass to :meth:`Block.create`.
+    :param  session: Database session to get the chain tip.
+    :param interval: seconds between checks of the chain tip.
+    """
+    bind = session.get_bind()
+    query = db.select([db.func.max(Block.id)])
+
+    def watch():
+        while not cancel.wait(interval):
+            if (bind.execute(query).scalar() or 0) >= height:
+                cancel.set()
+
+    thread = threading.Thread(target=watch, daemon=True)
+    thread.start()
+    return thread
+
+
+def fetch_blocks(
+        peers: Sequence[Tuple[Node, int]], from_: int,
+        prev_hash: Optional[str]=None, limit: int=SYNC_PAGE_SIZE,
+        echo: Optional[Callable]=None
+) -> Iterator[List[dict]]:
+    """
+    Fetch serialized blocks page by page, until the last block of the
+    first peer.  Pages up to each peer's tip are downloaded concurrently
+    from :const:`SYNC_PEERS` peers at most, and yielded in order.  A page
+    that fails or does not continue the chain is retried against another
+    peer having it, and :exc:`nekoyume.exc.NodeUnavailable` is raised
+    when no peer is left to retry.
+
+    :param     peers: pairs of :class:`nekoyume.node.Node` and the id of its
+                      last block, the sync target first.
+    :param     from_: id of the first block to fetch.
+    :param prev_hash: hash of the block before the first block to fetch.
+    :param     limit: number of blocks in a page.
+    """
+    node, tip = peers[0]
+    max_workers = max(1, min(SYNC_PEERS, len(peers)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        def submit(start: int, attempt: int):
+            stop = min(start + limit - 1, tip)
+            candidates = [n for n, t in peers if t >= stop]
+            if attempt >= len(candidates):
+                return None
+            peer = candidates[(start // limit + attempt) % len(candidates)]
+            return executor.submit(fetch_page, peer, start, stop)
+
+        starts = iter(range(from_, tip + 1, limit))
+        pending = collections.deque()
+        while True:
+            for start in itertools.islice(starts,
+                                          max_workers * 2 - len(pending)):
+                pending.append((start, 0, submit(start, 0)))
+            if not pending:
+                break
+            start, attempt, future = pending.popleft()
+            if echo:
+                echo(f'Syncing blocks...(from: {start})')
+            try:
+                blocks = future.result()
+            except (ConnectionError, NodeUnavailable, Timeout, ValueError):
+                blocks = None
+            stop = min(start + limit - 1, tip)
+            if blocks is None or not blocks or \
+               blocks[0]['prev_hash'] != prev_hash or \
+               [b['id'] for b in blocks] != \
+               list(range(start, start + len(blocks))):
+                future = submit(start, attempt + 1)
+                if future is None:
+                    raise NodeUnavailable
+                pending.appendleft((start, attempt + 1, future))
+                continue
+            yield blocks
+            prev_hash = blocks[-1]['hash']
+            if len(blocks) < stop - start + 1:
+                return
+        from_ = tip + 1
+
+    # Blocks can be added to the sync target while syncing.
+    while True:
+        if echo:
+            echo(f'Syncing blocks...(from: {from_})')
+        try:
+            blocks = fetch_page(node, from_, from_ + limit - 1)
+        except ValueError:
+            raise NodeUnavailable
+        if not blocks:
+            return
+        yield blocks
+        if len(blocks) < limit:
+            return
+        from_ += limit
+
+
+def fetch_headers(node: Node, from_: int,
+                  to: int) -> Optional[List['Block']]:
+    """
+    Fetch block headers of the given range from the node.
+
+    :param  node: :class:`nekoyume.node.Node` to fetch headers.
+    :param from_: id of the first block to fetch.
+    :param    to: id of the last block to fetch.
+    :return: blocks without moves, or :const:`None` if the node doesn't
+             serve headers.
+    """
+    headers = []
+    while from_ <= to:
+        response = get(f"{node.url}{Node.get_headers_endpoint}",
+                       params={'from': from_, 'to': to},
+                       timeout=(PEER_TIMEOUT, PEER_BULK_TIMEOUT))
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise NodeUnavailable
+        try:
+            page = response.json()['headers']
+        except (KeyError, ValueError):
+            # older nodes answer this as a block hash.
+            return None
+        if not page:
+            break
+        headers.extend(Block.deserialize(header) for header in page)
+        from_ = headers[-1].id + 1
+    return headers
+
+
+def validate_headers(headers: Sequence['Block'],
+                     prev_blocks: Iterable['Block'],
+                     branch_point: int) -> bool:
+    """
+    Check if the given headers make a valid chain following the branch
+    point, without their moves.
+
+    :param      headers: blocks without moves fetched by
+                         :func:`fetch_headers`.
+    :param  prev_blocks: blocks until the branch point.
+    :param branch_point: id of the last common block.
+    """
+    if [h.id for h in headers] != \
+       list(range(branch_point + 1, branch_point + 1 + len(headers))):
+        return False
+    window = collections.deque(prev_blocks, maxlen=DIFFICULTY_WINDOW)
+    for header in headers:
+        if not header.validate_header(window):
+            return False
+        window.append(header)
+    return True
+
+
+def fetch_page(node: Node, from_: int, to: int) -> List[dict]:
+    """
+    Fetch serialized blocks of the given range from the node.
+
+    :param  node: :class:`nekoyume.node.Node` to fetch blocks.
+    :param from_: id of the first block to fetch.
+    :param    to: id of the last block to fetch.
+    """
+    response = get(f"{node.url}{Node.get_blocks_endpoint}",
+                   params={'from': from_, 'to': to},
+                   timeout=(PEER_TIMEOUT, PEER_BULK_TIMEOUT))
+    if response.status_code != 200:
+        raise NodeUnavailable
+    return response.json()['blocks']
+
+
+def verify_blocks(
+        serialized_blocks: List[dict], parallel: bool=False
+) -> List[Tuple['Block', List[Move]]]:
+    """
+    Deserialize blocks and their moves, and verify every move of them at
+    once to fan them out across processes.  Moves are not attached to
+    blocks yet, since some of them can be already stored.
+
+    :param serialized_blocks: serialized blocks fetched by
+                              :func:`fetch_blocks`.
+    :param          parallel: check if you want to verify moves in a
+                              process pool.  see also :func:`verify_moves`.
+    :return: deserialized blocks with their moves.
+    """
+    blocks = [
+        (Block.deserialize(serialized),
+         [Move.deserialize(move, serialized['id'])
+          for move in serialized['moves']])
+        for serialized in serialized_blocks
+    ]
+    if not all(verify_moves([m for _, moves in blocks for m in moves],
+                            parallel)):
+        raise InvalidMoveError
+    return blocks
+
+
+def locate_branch_point(node: Node, session,
+                        tip_id: int) -> Optional[int]:
+    """
+    Find the highest common block with the node in a single request, by
+    sending it the locator of our chain (see :meth:`Block.locator`).
+    The result can be lower than the exact branch point by the spacing of
+    the locator there, which only costs downloading a few common blocks.
+
+    :param   node: :class:`nekoyume.node.Node` to compare chains.
+    :param session: Database session to get our chain.
+    :param  tip_id: id of our last block.
+    :return: id of the common block, 0 if there isn't, or :const:`None` if
+             the node doesn't support locators.
+    """
+    response = post(f"{node.url}{Node.locate_endpoint}",
+                    json={'locator': Block.locator(tip_id, session)})
+    if response.status_code in (404, 405):
+        return None
+    if response.status_code != 200:
+        raise NodeUnavailable
+    return response.json()['block_id']
+
+
 def find_branch_point(
         node: Node, session, value: int, high: int
 ) -> int:
-    if value > high:
-        return 0
-    mid = int((value + high) / 2)
-    response = get(f"{node.url}{Node.get_blocks_endpoint}/{mid}")
-    if response.status_code == 200:
-        block = session.query(Block).get(mid)
-        node_block = response.json().get('block')
-        if block and node_block and block.hash == node_block['hash']:
-            if value == mid:
-                return value
-            return find_branch_point(node, session, mid, high)
+    while value <= high:
+        mid = int((value + high) / 2)
+        response = get(f"{node.url}{Node.get_blocks_endpoint}/{mid}")
+        if response.status_code == 200:
+            block = session.query(Block).get(mid)
+            node_block = response.json().get('block')
+            if block and node_block and block.hash == node_block['hash']:
+                if value == mid:
+                    return value
+                value = mid
+            else:
+                high = mid - 1
+        elif response.status_code == 404:
+            high = mid - 1
         else:
-            return find_branch_point(node, session, value, mid - 1)
-    elif response.status_code == 404:
-        return find_branch_point(node, session, value, mid - 1)
-    raise NodeUnavailable
+            raise NodeUnavailable
+    return 0
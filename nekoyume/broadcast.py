@@ -1,31 +1,53 @@
+import concurrent.futures
 import datetime
 import os
-from typing import Callable, Mapping, Optional
+import random
+import time
+from typing import Callable, List, Mapping, Optional
 import urllib.parse
 
-from requests import Response, post
-from requests.exceptions import ConnectionError, Timeout
+from flask import current_app
+from requests import Response
+from requests.exceptions import ConnectionError, ReadTimeout, Timeout
 from sqlalchemy.orm.query import Query
 
 from .block import Block
 from .node import Node
 from .orm import db
+from .peer import PEER_BULK_TIMEOUT, PEER_TIMEOUT, post
+from .user import cache
 
 
 __all__ = (
     'BROADCAST_LIMIT',
+    'GOSSIP_FANOUT',
+    'GOSSIP_SEEN_TIMEOUT',
+    'MULTICAST_WORKERS',
+    'POST_BLOCKS_BATCH_ENDPOINT',
     'POST_BLOCK_ENDPOINT',
+    'POST_MOVES_BATCH_ENDPOINT',
     'POST_MOVE_ENDPOINT',
     'POST_NODE_ENDPOINT',
     'broadcast_block',
     'broadcast_move',
+    'broadcast_moves',
     'broadcast_node',
     'multicast',
 )
 
-BROADCAST_LIMIT = os.environ.get('BROADCAST_LIMIT', 100)
+BROADCAST_LIMIT = int(os.environ.get('BROADCAST_LIMIT', 100))
+#: Maximum number of nodes to broadcast to at once.
+MULTICAST_WORKERS: int = int(os.environ.get('MULTICAST_WORKERS', 16))
+#: Number of nodes to relay a message to.  0 floods every node.
+GOSSIP_FANOUT: int = int(os.environ.get('GOSSIP_FANOUT', 8))
+#: Seconds to remember a relayed message not to relay it again.
+GOSSIP_SEEN_TIMEOUT: int = int(os.environ.get('GOSSIP_SEEN_TIMEOUT', 600))
+#: Nodes connected in this period are preferred to relay messages.
+GOSSIP_HEALTHY_PERIOD = datetime.timedelta(hours=3)
 POST_BLOCK_ENDPOINT = '/blocks'
+POST_BLOCKS_BATCH_ENDPOINT = '/blocks/batch'
 POST_MOVE_ENDPOINT = '/moves'
+POST_MOVES_BATCH_ENDPOINT = '/moves/batch'
 POST_NODE_ENDPOINT = '/nodes'
 
 
@@ -38,11 +60,41 @@ def multicast(
         sent_node: Optional[Node]=None,
         my_node: Optional[Node]=None,
 ) -> None:
-    for node in filter_nodes(sent_node):
-        try:
-            broadcast(serialized, node, my_node)
-        except (ConnectionError, Timeout):
-            continue
+    """
+    Relay the object to :const:`GOSSIP_FANOUT` nodes sampled among nodes you
+    know, preferring recently connected ones, at once, using up to
+    :const:`MULTICAST_WORKERS` threads.  Nodes being backed off from are
+    skipped, and the health of every node sampled is recorded at the end.
+    The same object isn't relayed again for :const:`GOSSIP_SEEN_TIMEOUT`
+    seconds.
+
+    :param serialized: serialized object to broadcast.
+    :param  broadcast: function to broadcast the object to a node, e.g.,
+                       :func:`broadcast_block`.
+    :param  sent_node: :class:`nekoyume.node.Node` the object came from,
+                       not to broadcast it back.
+    :param    my_node: this :class:`nekoyume.node.Node`.
+    """
+    if not remember_message(serialized, broadcast):
+        return
+    urls = sample_nodes(sent_node)
+    if urls:
+        app = current_app._get_current_object()
+
+        def send(url: str) -> Optional[float]:
+            # Each thread has its own session to query in the app context.
+            with app.app_context():
+                started_at = time.perf_counter()
+                try:
+                    broadcast(serialized, Node(url=url), my_node)
+                except (ConnectionError, Timeout):
+                    return None
+            return time.perf_counter() - started_at
+
+        workers = min(MULTICAST_WORKERS, len(urls))
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            latencies = dict(zip(urls, executor.map(send, urls)))
+        Node.record_many(latencies)
     db.session.commit()
 
 
@@ -89,22 +141,42 @@ def broadcast_block(
         # 0 is Genesis block.
         block_id = result.get('block_id', 0)
         query = db.session.query(Block).filter(
-            Block.id.between(block_id, serialized['id'])
+            Block.id > block_id,
+            Block.id <= serialized['id'],
         ).order_by(Block.id)
+        batch_url = urllib.parse.urljoin(sent_node.url,
+                                         POST_BLOCKS_BATCH_ENDPOINT)
         offset = 0
         while True:
             sync_blocks = query[
                 offset:offset+BROADCAST_LIMIT
             ]
-            # TODO bulk api
-            for block in sync_blocks:
-                s = block.serialize(
+            if not sync_blocks:
+                break
+            serialized_blocks = [
+                block.serialize(
                     use_bencode=False,
                     include_suffix=True,
                     include_moves=True,
                     include_hash=True
                 )
-                _broadcast(url, s)
+                for block in sync_blocks
+            ]
+            if batch_url:
+                try:
+                    res = post(batch_url, json=serialized_blocks,
+                               timeout=(PEER_TIMEOUT, PEER_BULK_TIMEOUT))
+                except ReadTimeout:
+                    # The node is busy verifying blocks, rather than down.
+                    break
+                if res.status_code in (404, 405):
+                    # Nodes of older versions take blocks one by one.
+                    batch_url = None
+                elif res.status_code != 200:
+                    break
+            if not batch_url:
+                for s in serialized_blocks:
+                    _broadcast(url, s)
             offset += BROADCAST_LIMIT
             if len(sync_blocks) < BROADCAST_LIMIT:
                 break
@@ -130,8 +202,76 @@ def broadcast_move(
     _broadcast(url, serialized, sent_node, my_node)
 
 
+def broadcast_moves(
+        serialized: Mapping[str, object],
+        sent_node: Optional[Node]=None,
+        my_node: Optional[Node]=None,
+) -> None:
+    """
+    It broadcast a bundle of moves to every nodes you know.
+
+    :param      serialized: a mapping which has ``moves``, a list of
+                            serialized :class:`nekoyume.move.Move`.
+    :param       sent_node: sent :class:`nekoyume.node.Node`.
+                            this node ignore sent node.
+    :param         my_node: my :class:`nekoyume.node.Node`.
+                            received node ignore my node when they
+                            broadcast received object.
+    """
+    url = urllib.parse.urljoin(sent_node.url, POST_MOVES_BATCH_ENDPOINT)
+    res = _broadcast(url, serialized, sent_node, my_node)
+    if res.status_code in (404, 405):
+        # Nodes of older versions take moves one by one.
+        for move in serialized['moves']:
+            broadcast_move(move, sent_node, my_node)
+
+
+def remember_message(
+        serialized: Mapping[str, object],
+        broadcast: Callable[
+            [Mapping[str, object], Optional[Node], Optional[Node]],
+            None
+        ],
+) -> bool:
+    """
+    Remember a message to relay.  Blocks are identified by their hash,
+    moves by their id, and nodes by their url.
+
+    :return: :const:`False` if the message was relayed recently.
+    """
+    message_id = (serialized.get('hash') or serialized.get('id') or
+                  serialized.get('url'))
+    if message_id is None:
+        return True
+    key = f'gossip/{broadcast.__name__}/{message_id}'
+    return cache.add(key, True, timeout=GOSSIP_SEEN_TIMEOUT)
+
+
+def sample_nodes(sent_node: Optional[Node]=None) -> List[str]:
+    """
+    Pick urls of :const:`GOSSIP_FANOUT` random nodes to relay a message,
+    among recently connected ones first.
+
+    :param sent_node: :class:`nekoyume.node.Node` to exclude.
+    """
+    healthy_since = datetime.datetime.utcnow() - GOSSIP_HEALTHY_PERIOD
+    urls = {True: [], False: []}
+    query = filter_nodes(sent_node).with_entities(
+        Node.url, Node.last_connected_at >= healthy_since
+    )
+    for url, healthy in query:
+        urls[bool(healthy)].append(url)
+    if GOSSIP_FANOUT <= 0:
+        return urls[True] + urls[False]
+    sampled = []
+    for candidates in urls[True], urls[False]:
+        k = min(GOSSIP_FANOUT - len(sampled), len(candidates))
+        sampled.extend(random.sample(candidates, k))
+    return sampled
+
+
 def filter_nodes(sent_node: Optional[Node]=None) -> Query:
-    query = db.session.query(Node)
+    query = db.session.query(Node).filter(~Node.down)
     if sent_node:
         query = query.filter(
             Node.url != sent_node.url
@@ -143,9 +283,5 @@ def _broadcast(url: str, serialized: Mapping[str, object],
                node: Optional[Node]=None,
                sent_node: Optional[Node]=None) -> Response:
     if sent_node:
-        serialized['sent_node'] = sent_node.url
-    res = post(url, json=serialized, timeout=3)
-    if node:
-        node.last_connected_at = datetime.datetime.utcnow()
-        db.session.add(node)
-    return res
+        serialized = dict(serialized, sent_node=sent_node.url)
+    return post(url, json=serialized)
@@ -0,0 +1,56 @@
+"""
+Cache
+=====
+
+`cache.py` contains the cache backend used unless redis is configured.
+It is :class:`werkzeug.contrib.cache.FileSystemCache`, but evicts the least
+recently used entries once it holds more than ``CACHE_THRESHOLD`` entries,
+instead of every third one.
+"""
+import os
+
+from werkzeug.contrib.cache import FileSystemCache
+
+
+__all__ = 'LRUFileSystemCache', 'lru_filesystem'
+
+
+class LRUFileSystemCache(FileSystemCache):
+    """:class:`~werkzeug.contrib.cache.FileSystemCache` evicting the least
+    recently used entries.  Files are touched when they are read, so their
+    modification times tell when they were used last.
+    """
+
+    def get(self, key):
+        value = super().get(key)
+        if value is not None:
+            try:
+                os.utime(self._get_filename(key))
+            except OSError:
+                pass
+        return value
+
+    def _prune(self):
+        if self._threshold == 0 or not self._file_count > self._threshold:
+            return
+        entries = []
+        for filename in self._list_dir():
+            try:
+                entries.append((os.path.getmtime(filename), filename))
+            except OSError:
+                pass
+        entries.sort()
+        # Evict down to 2/3 of the threshold not to prune on every set.
+        for _, filename in entries[:len(entries) - self._threshold * 2 // 3]:
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+        self._update_count(value=len(self._list_dir()))
+
+
+def lru_filesystem(app, config, args, kwargs) -> LRUFileSystemCache:
+    """Flask-Caching backend factory of :class:`LRUFileSystemCache`."""
+    args.insert(0, config['CACHE_DIR'])
+    kwargs.update(threshold=config['CACHE_THRESHOLD'])
+    return LRUFileSystemCache(*args, **kwargs)
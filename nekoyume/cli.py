@@ -1,18 +1,36 @@
+import collections
+import json
 import os
+import threading
 import time
 
 from babel.messages.frontend import compile_catalog
-from click import IntRange, ParamType, argument, echo, group, option
+from click import (
+    File,
+    IntRange,
+    ParamType,
+    argument,
+    echo,
+    group,
+    option,
+)
 from coincurve import PrivateKey
 from ptpython.repl import embed
 
 from .app import app
-from .block import Block
+from .benchmark import bench_check, bench_mint, environment
+from .block import (
+    DIFFICULTY_WINDOW,
+    SYNC_HEADERS_FIRST,
+    Block,
+    CreatorCount,
+    watch_tip,
+)
 from .broadcast import broadcast_block, broadcast_node, multicast
-from .move import Move, get_my_public_url
+from .move import Move, MoveDetail, refresh_public_url
 from .node import Node
 from .orm import db
-from .user import User
+from .user import AvatarSnapshot, User
 
 
 DEFAULT_SEED_NODE_URL = os.environ.get(
@@ -42,11 +60,17 @@ def cli():
 @cli.command()
 @argument('private_key', type=PrivateKeyType())
 @option('--sleep', default=0, type=float)
-def mine(private_key: PrivateKey, sleep: float):
+@option('--workers', default=1, type=IntRange(min=1),
+        help='Number of processes to mine blocks')
+def mine(private_key: PrivateKey, sleep: float, workers: int):
     app.app_context().push()
 
     while True:
         Block.sync()
+        tip = Block.query.order_by(Block.id.desc()).first()
+        height = tip.id + 1 if tip else 1
+        cancel = threading.Event()
+        watch_tip(height, cancel)
         block = Block.create(
             User(private_key),
             [m
@@ -54,7 +78,12 @@ def mine(private_key: PrivateKey, sleep: float):
              if m.valid],
             echo=echo,
             sleep=sleep,
+            workers=workers,
+            cancel=cancel,
         )
+        if block is None and cancel.is_set():
+            echo(f'Block {height} is mined by another node; restarting.')
+        cancel.set()
         if block:
             serialized = block.serialize(
                 use_bencode=False,
@@ -80,6 +109,7 @@ def shell():
         default=False,
         help='Synchronize after initialization or skip it')
 def init(seed, sync):
+    app.app_context().push()
     echo('Creating database...')
     db.create_all()
     echo(f'Updating node... (seed: {seed})')
@@ -104,8 +134,12 @@ def init(seed, sync):
         default=DEFAULT_SYNC_INTERVAL,
         type=float,
         help='Sync interval')
-def sync(seed: str, interval: float):
-    public_url = get_my_public_url()
+@option('--headers-first/--no-headers-first',
+        default=SYNC_HEADERS_FIRST,
+        help='Validate block headers before downloading their moves')
+def sync(seed: str, interval: float, headers_first: bool):
+    app.app_context().push()
+    public_url = refresh_public_url()
     if public_url:
         echo(f"You have a public node url. ({public_url})")
         multicast(serialized={'url': public_url}, broadcast=broadcast_node)
@@ -119,7 +153,7 @@ def sync(seed: str, interval: float):
             prev_id = Block.query.order_by(Block.id.desc()).first().id
         except AttributeError:
             prev_id = 0
-        Block.sync(echo=echo)
+        Block.sync(echo=echo, headers_first=headers_first)
         try:
             if prev_id == Block.query.order_by(Block.id.desc()).first().id:
                 echo("The blockchain is up to date.")
@@ -133,25 +167,33 @@ def sync(seed: str, interval: float):
 @cli.command()
 def doctor():
     id = 1
+    window = collections.deque(maxlen=DIFFICULTY_WINDOW)
     for block in Block.query.order_by(Block.id.asc()):
         if block.id != id:
             echo(f'Block {id}: is empty.')
             id = block.id
-        if not block.valid:
+        if not block.validate(window):
             echo(f'Block {id}: is invalid.')
+        window.append(block)
         id += 1
 
 
 @cli.command()
 def repair():
     id = 1
+    window = collections.deque(maxlen=DIFFICULTY_WINDOW)
     for block in Block.query.order_by(Block.id.asc()):
-        if block.id != id or not block.valid:
+        if block.id != id or not block.validate(window):
+            AvatarSnapshot.truncate(id - 1)
+            CreatorCount.query.filter(
+                CreatorCount.block_id >= block.id
+            ).delete(synchronize_session='fetch')
             Block.query.filter(Block.id >= block.id).delete(
                 synchronize_session='fetch'
             )
             echo(f'Block {id}+ was removed.')
             break
+        window.append(block)
         id += 1
 
     deleted_move_ids = []
@@ -168,6 +210,106 @@ def repair():
     db.session.commit()
 
 
+@cli.command()
+def migrate():
+    """Migrate the database created by an older version."""
+    engine = db.engine
+    columns = {
+        column['name']
+        for column in db.inspect(engine).get_columns(Move.__tablename__)
+    }
+    if 'receiver' not in columns:
+        echo('Adding receiver column to moves...')
+        engine.execute('ALTER TABLE move ADD COLUMN receiver VARCHAR')
+        for index in Move.__table__.indexes:
+            if index.name == 'ix_move_receiver':
+                index.create(engine)
+        receiver = db.select([MoveDetail.value]).where(
+            (MoveDetail.move_id == Move.id) &
+            (MoveDetail.key == 'receiver')
+        ).as_scalar()
+        engine.execute(
+            Move.__table__.update().where(
+                Move.name == 'send'
+            ).values(receiver=receiver)
+        )
+    node_columns = {
+        column['name']
+        for column in db.inspect(engine).get_columns(Node.__tablename__)
+    }
+    health_columns = [
+        ('success_count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('failure_count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('latency', 'FLOAT'),
+        ('retry_at', 'TIMESTAMP'),
+    ]
+    for name, type_ in health_columns:
+        if name not in node_columns:
+            echo(f'Adding {name} column to nodes...')
+            engine.execute(f'ALTER TABLE node ADD COLUMN {name} {type_}')
+    db.create_all()
+    counted = db.session.query(
+        db.func.max(CreatorCount.block_id)
+    ).scalar() or 0
+    uncounted_blocks = Block.query.filter(
+        Block.id > counted
+    ).order_by(Block.id.asc())
+    if uncounted_blocks.count():
+        echo('Counting blocks of each creator...')
+        counts = {}
+        for block in uncounted_blocks:
+            if block.creator not in counts:
+                counts[block.creator] = CreatorCount.get(block.creator,
+                                                         counted)
+            counts[block.creator] += 1
+            db.session.add(CreatorCount(
+                block_id=block.id,
+                creator=block.creator,
+                count=counts[block.creator],
+            ))
+        db.session.commit()
+    echo('The database is up to date.')
+
+
+@cli.command('bench-hashcash')
+@option('--bits', 'bits_list', multiple=True, type=IntRange(0, 256),
+        default=(8, 12, 16), show_default=True,
+        help='Difficulty bits to mint.  It can be repeated')
+@option('--size', 'sizes', multiple=True, type=IntRange(min=1),
+        default=(64, 256), show_default=True,
+        help='Challenge size in bytes.  It can be repeated')
+@option('--workers', 'workers_list', multiple=True, type=IntRange(min=1),
+        default=(1, os.cpu_count() or 1), show_default=True,
+        help='Number of processes to mint.  It can be repeated')
+@option('--rounds', default=3, type=IntRange(min=1), show_default=True,
+        help='Number of challenges to mint for each case')
+@option('--seed', default=0, type=int, show_default=True,
+        help='Seed to generate challenges')
+@option('--output', type=File('w'),
+        help='File to write results in JSON, e.g., - for stdout')
+def bench_hashcash(bits_list, sizes, workers_list, rounds: int, seed: int,
+                   output) -> None:
+    """Measure hashcash minting and checking throughput."""
+    results = []
+    for size in sizes:
+        result = bench_check(size, seed=seed)
+        echo(f'check  size={size:<5} '
+             f'{result["hashes_per_second"]:>12,.0f} hashes/s')
+        results.append(result)
+        for bits in bits_list:
+            for workers in sorted(set(workers_list)):
+                result = bench_mint(bits, size, workers, rounds, seed)
+                echo(f'mint   size={size:<5} bits={bits:<3} '
+                     f'workers={workers:<3} '
+                     f'{result["hashes_per_second"] or 0:>12,.0f} hashes/s '
+                     f'{result["time_to_solution"]:>10.4f} s/solution')
+                results.append(result)
+    if output:
+        json.dump({'environment': environment(), 'results': results},
+                  output, indent=2)
+        output.write('\n')
+
+
 @cli.command()
 @option('--host',
         default='127.0.0.1',
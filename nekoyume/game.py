@@ -6,10 +6,9 @@ from flask import (Blueprint, Response, g, redirect, render_template, request,
 from flask_babel import Babel
 from sqlalchemy import func
 
-from .broadcast import broadcast_move, multicast
 from .move import LevelUp, Move
-from .node import Node
 from .orm import db
+from .tasks import relay_move
 from .user import User, cache
 
 
@@ -153,15 +152,10 @@ def get_new_novice():
             move = g.user.create_novice({'name': session.get('name', '')})
             db.session.add(move)
             db.session.commit()
-            serialized = move.serialize(
-                use_bencode=False,
-                include_signature=True,
-                include_id=True,
-            )
-            multicast(
-                serialized=serialized,
-                my_node=Node(url=f'{request.scheme}://{request.host}'),
-                broadcast=broadcast_move,
+            relay_move(
+                move.id,
+                sent_node_url=None,
+                my_node_url=f'{request.scheme}://{request.host}'
             )
         return render_template('new.html', move=move)
     return redirect(url_for('.get_game'))
@@ -213,15 +207,10 @@ def post_move():
         move = g.user.move_zone(request.values.get('zone'))
 
     if move:
-        serialized = move.serialize(
-            use_bencode=False,
-            include_signature=True,
-            include_id=True,
-        )
-        multicast(
-            serialized=serialized,
-            my_node=Node(url=f'{request.scheme}://{request.host}'),
-            broadcast=broadcast_move,
+        relay_move(
+            move.id,
+            sent_node_url=None,
+            my_node_url=f'{request.scheme}://{request.host}'
         )
     return redirect(url_for('.get_game'))
 
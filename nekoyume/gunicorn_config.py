@@ -0,0 +1,18 @@
+"""
+Gunicorn config
+===============
+
+`gunicorn_config.py` contains gunicorn server hooks to run a node::
+
+    gunicorn -c python:nekoyume.gunicorn_config nekoyume.app:app
+
+"""
+from .move import start_public_url_refresher
+
+
+def post_worker_init(worker) -> None:
+    """
+    Resolve the public url of this node in the background, once the
+    worker is ready to answer the ping resolving it.
+    """
+    start_public_url_refresher()
@@ -19,22 +19,52 @@ any particular fields or delimiters in *challenge*.  E.g., you might get:
     '000090605c0a82a7aeac7bd99cb61002f16ced96e649edd58b8baaa3c747304a'
 
 Notice that :func:`_mint()` behaves deterministically, finding the same suffix
-every time it is passed the same arguments.
+every time it is passed the same arguments.  It stays so even if the search
+is split across several processes:
+
+    >>> _mint(b'foo', bits=16, workers=2)
+    b'-g'
 """
+import collections
 import hashlib
-import math
+import itertools
+import multiprocessing
+import multiprocessing.pool
 import sys
+import threading
 import time
 import typing
 
 
+#: Number of counters a worker process tries at once.
+MINT_CHUNK_SIZE: int = 2 ** 16
+#: Seconds to wait for a worker process before checking if minting is
+#: cancelled.
+MINT_POLL_INTERVAL: float = 0.1
+
+
 def _mint(challenge: bytes, bits: int,
-          sleep: typing.Union[int, float]=0) -> bytes:
+          sleep: typing.Union[int, float]=0,
+          workers: int=1,
+          cancel: typing.Optional[threading.Event]=None,
+          deadline: typing.Optional[float]=None,
+          pool: typing.Optional[multiprocessing.pool.Pool]=None
+          ) -> typing.Optional[bytes]:
     """Answer a generalized Hashcash_ challenge.
 
     This function accepts a generalized prefix *challenge*,
     and returns only a suffix that produces the requested SHA leading zeros.
 
+    If *workers* is greater than 1, the counters are partitioned into chunks
+    of :const:`MINT_CHUNK_SIZE` and tried across that many processes.
+    The result is the same as the single process one, i.e., the suffix of
+    the lowest counter that answers the challenge.  A *pool* of that many
+    processes can be passed to reuse it across challenges; otherwise one is
+    started and terminated in every call.
+
+    It gives up and returns :const:`None` once *cancel* is set, or when
+    :func:`time.time()` reaches *deadline*.
+
     .. _Hashcash: https://en.wikipedia.org/wiki/Hashcash
 
     """
@@ -42,21 +72,121 @@ def _mint(challenge: bytes, bits: int,
         raise TypeError(
             f'challenge must be an instance of bytes, not {challenge}'
         )
+
+    def stopped() -> bool:
+        return (cancel is not None and cancel.is_set() or
+                deadline is not None and time.time() >= deadline)
+
+    if cancel is None:
+        time.sleep(sleep)
+    else:
+        cancel.wait(sleep)
+    if workers <= 1:
+        counter = _search(challenge, bits, 1, stopped=stopped)
+    else:
+        counter = _search_parallel(challenge, bits, workers, stopped, pool)
+    return None if counter is None else _answer(counter)
+
+
+def _answer(counter: int) -> bytes:
+    return counter.to_bytes((counter.bit_length() + 7) // 8, sys.byteorder)
+
+
+#: Every possible byte, to build a batch of answers at once.
+_BYTES: typing.Sequence[bytes] = [bytes([b]) for b in range(256)]
+
+
+def _search(challenge: bytes, bits: int,
+            start: int, stop: typing.Optional[int]=None,
+            stopped: typing.Optional[typing.Callable[[], bool]]=None
+            ) -> typing.Optional[int]:
+    """Find the lowest counter in the range that answers the challenge.
+
+    The challenge is hashed only once, and its hash object is copied to
+    feed only the answer of each counter.  Counters are tried in batches of
+    256, which share every byte of their answers but the lowest one.
+
+    :param challenge: hashcash challenge.
+    :param      bits: number of leading zero bits to find.
+    :param     start: the first counter to try.
+    :param      stop: the counter to stop before.  it searches endlessly
+                      if omitted.
+    :param   stopped: a function checked between batches to give up
+                      the search.
+    :return: the found counter, or :const:`None` if there is no answer in
+             the range or it is given up.
+
+    """
+    if bits <= 0:
+        return start if stop is None or start < stop else None
+    # A digest has the leading zero bits if and only if it is less than
+    # the target in big endian.
+    target = (1 << (256 - bits)).to_bytes(32, 'big') if bits <= 256 else b''
     # These function aliases purpose to prevent global lookup which is way
-    # slower than local lookup in Python VM.
-    log2 = math.log2
-    sha256 = hashlib.sha256
+    # slower than local lookup in Python VM.  Methods are looked up on the
+    # type to map them over a batch without Python level calls.
+    midstate = hashlib.sha256(challenge)
+    hash_type = type(midstate)
+    copy, update, digest = hash_type.copy, hash_type.update, hash_type.digest
+    repeat = itertools.repeat
     byteorder = sys.byteorder
+    little = byteorder == 'little'
+    all_bytes = _BYTES
+
+    base = start - start % 256
+    while stop is None or base < stop:
+        if stopped is not None and stopped():
+            return None
+        high = base >> 8
+        rest = high.to_bytes((high.bit_length() + 7) // 8, byteorder)
+        first = max(start - base, 0)
+        last = 256 if stop is None else min(256, stop - base)
+        if little:
+            answers = [b + rest for b in all_bytes[first:last]]
+        else:
+            answers = [rest + b for b in all_bytes[first:last]]
+        hashes = list(map(copy, repeat(midstate, last - first)))
+        collections.deque(map(update, hashes, answers), maxlen=0)
+        digests = list(map(digest, hashes))
+        if min(digests) < target:
+            for i, d in enumerate(digests, start=base + first):
+                if d < target:
+                    return i
+        base += 256
+    return None
 
-    counter = 1
-    time.sleep(sleep)
-    while 1:
-        answer_bytes_length = 1 + int(log2(counter) // 8)
-        answer = counter.to_bytes(answer_bytes_length, byteorder)
-        digest = sha256(challenge + answer).digest()
-        if has_leading_zero_bits(digest, bits):
-            return answer
-        counter += 1
+
+def _search_parallel(challenge: bytes, bits: int, workers: int,
+                     stopped: typing.Optional[typing.Callable[[], bool]]=None,
+                     pool: typing.Optional[multiprocessing.pool.Pool]=None
+                     ) -> typing.Optional[int]:
+    """Same as :func:`_search()` from 1, but across *workers* processes.
+    Chunks are collected in order, so the first answer collected is the
+    lowest one, and the rest of workers are terminated on it, unless they
+    are of the given *pool*.
+
+    """
+    if pool is None:
+        with multiprocessing.Pool(workers) as pool:
+            return _search_parallel(challenge, bits, workers, stopped, pool)
+    starts = itertools.count(1, MINT_CHUNK_SIZE)
+    pending = collections.deque()
+    while stopped is None or not stopped():
+        while len(pending) < workers * 2:
+            start = next(starts)
+            pending.append(pool.apply_async(
+                _search,
+                (challenge, bits, start, start + MINT_CHUNK_SIZE)
+            ))
+        result = pending.popleft()
+        while not result.ready():
+            if stopped is not None and stopped():
+                return None
+            result.wait(MINT_POLL_INTERVAL)
+        counter = result.get()
+        if counter is not None:
+            return counter
+    return None
 
 
 def check(stamp, resource=None, bits=None,
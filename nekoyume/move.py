@@ -5,15 +5,19 @@ Move
 `move.py` contains every relations regarding nekoyume blockchain and
 game moves.
 """
+import collections
+import concurrent.futures
 import datetime
+import functools
 import hashlib
 import os
 import random
 import re
+import threading
+from typing import Callable, List, Optional, Sequence
 
 from bencode import bencode
 from coincurve import PublicKey
-from requests import get
 from requests.exceptions import ConnectionError, Timeout
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm.collections import attribute_mapped_collection
@@ -22,14 +26,49 @@ from .battle.characters import Factory as CharacterFactory
 from .battle.simul import Simulator
 from .exc import InvalidMoveError, OutOfRandomError
 from .orm import db
+from .peer import get
 from .tables import Tables
 from .util import deserialize_datetime, ensure_block, get_address
 
 
 NUM_HACK_AND_SLASH_MONSTERS: int = 3
-
-
-def get_my_public_url():
+#: Number of processes to verify moves.  1 disables parallel verification.
+VERIFY_WORKERS: int = int(
+    os.environ.get('VERIFY_WORKERS', os.cpu_count() or 1)
+)
+#: Minimum number of moves to verify them in parallel.
+PARALLEL_VERIFY_THRESHOLD: int = int(
+    os.environ.get('PARALLEL_VERIFY_THRESHOLD', 64)
+)
+#: Number of verified moves to remember not to verify them again.
+VERIFIED_MOVES_CACHE_SIZE: int = int(
+    os.environ.get('VERIFIED_MOVES_CACHE_SIZE', 100000)
+)
+#: Seconds between refreshes of the public url of this node.
+PUBLIC_URL_REFRESH_INTERVAL: float = float(
+    os.environ.get('PUBLIC_URL_REFRESH_INTERVAL', 600)
+)
+
+#: (id, signature) pairs of moves already verified, in least recently used
+#: order.
+verified_moves: collections.OrderedDict = collections.OrderedDict()
+verified_moves_lock = threading.Lock()
+
+
+def fetch_public_ip() -> str:
+    """Ask an external service the public IP address of this node."""
+    return get('http://ip.42.pl/raw').text
+
+
+def resolve_public_url(
+        fetch_ip: Callable[[], str]=fetch_public_ip
+) -> Optional[str]:
+    """
+    Find the public url of this node, which answers to pings from outside.
+
+    :param fetch_ip: function to get the public IP address of this node.
+    :return: the url, or :const:`None` if the node isn't reachable.
+    """
     if 'PUBLIC_URL' in os.environ:
         return os.environ['PUBLIC_URL']
     try:
@@ -37,7 +76,7 @@ def get_my_public_url():
             port = ':' + os.environ.get('PORT', '80')
         else:
             port = ''
-        ip = get('http://ip.42.pl/raw').text
+        ip = fetch_ip()
         has_public_address = get(
             f'http://{ip}{port}/ping'
         ).text == 'pong'
@@ -49,6 +88,180 @@ def get_my_public_url():
         return None
 
 
+_public_url: Optional[str] = None
+_public_url_resolver: Callable[[], Optional[str]] = resolve_public_url
+_public_url_refresher_pid: Optional[int] = None
+_public_url_lock = threading.Lock()
+_public_url_refresh = threading.Event()
+
+
+def refresh_public_url() -> Optional[str]:
+    """
+    Resolve the public url of this node now, and keep it in memory to serve
+    by :func:`get_my_public_url`.
+    """
+    global _public_url
+    _public_url = _public_url_resolver()
+    return _public_url
+
+
+def start_public_url_refresher(
+        resolver: Optional[Callable[[], Optional[str]]]=None,
+        interval: float=PUBLIC_URL_REFRESH_INTERVAL
+) -> None:
+    """
+    Refresh the public url of this node every ``interval`` seconds in the
+    background.  A forked process, e.g., a gunicorn worker, starts its own
+    refresher, keeping the url its parent resolved until then.
+
+    :param resolver: function to find the public url, e.g., a stub to run
+                     offline.  :func:`resolve_public_url` by default.
+    :param interval: seconds between refreshes.
+    """
+    global _public_url_resolver, _public_url_refresher_pid
+    with _public_url_lock:
+        if resolver is not None:
+            _public_url_resolver = resolver
+        if _public_url_refresher_pid == os.getpid():
+            # Refresh the running one at once, e.g., with the new resolver.
+            _public_url_refresh.set()
+            return
+        _public_url_refresher_pid = os.getpid()
+
+    def refresh_forever():
+        while True:
+            refresh_public_url()
+            _public_url_refresh.wait(interval)
+            _public_url_refresh.clear()
+
+    threading.Thread(target=refresh_forever, daemon=True).start()
+
+
+def get_my_public_url() -> Optional[str]:
+    """
+    Get the public url of this node from memory, without requests.  It's
+    resolved and refreshed in the background by
+    :func:`start_public_url_refresher`, which gunicorn workers start when
+    they are ready (see :mod:`nekoyume.gunicorn_config`), or which starts
+    on the first call otherwise.
+    """
+    if 'PUBLIC_URL' in os.environ:
+        return os.environ['PUBLIC_URL']
+    if _public_url_refresher_pid != os.getpid():
+        start_public_url_refresher()
+    return _public_url
+
+
+def is_verified(id: str, signature: bytes, signed: bytes) -> bool:
+    """
+    Check if a move has been verified before.  Since a move's id is the
+    hash of its signed serialization, a move that still hashes to its id
+    has the same contents as the one verified with that id and signature.
+
+    :param        id: move's id.
+    :param signature: move's :attr:`Move.signature`.
+    :param    signed: move serialized with its signature.
+    """
+    key = id, signature
+    if key not in verified_moves:
+        return False
+    if id != hashlib.sha256(signed).hexdigest():
+        return False
+    with verified_moves_lock:
+        if key in verified_moves:
+            verified_moves.move_to_end(key)
+    return True
+
+
+def remember_verified(id: str, signature: bytes):
+    """Remember a move verified by :func:`verify_move`."""
+    with verified_moves_lock:
+        verified_moves[id, signature] = True
+        verified_moves.move_to_end((id, signature))
+        while len(verified_moves) > VERIFIED_MOVES_CACHE_SIZE:
+            verified_moves.popitem(last=False)
+
+
+def verify_move(id: str, user_public_key: bytes, user_address: str,
+                signature: bytes, unsigned: bytes, signed: bytes) -> bool:
+    """
+    Check if a move is signed by its user and identified by its hash.
+    It takes plain values instead of :class:`Move` to run in other processes.
+    Moves verified once are remembered, so checking them again is cheap.
+
+    :param              id: move's id.
+    :param user_public_key: move's :attr:`Move.user_public_key`.
+    :param    user_address: move's :attr:`Move.user_address`.
+    :param       signature: move's :attr:`Move.signature`.
+    :param        unsigned: move serialized without its signature.
+    :param          signed: move serialized with its signature.
+    """
+    if is_verified(id, signature, signed):
+        return True
+    assert isinstance(signature, bytes)
+    assert 68 <= len(signature) <= 71
+    assert isinstance(user_public_key, bytes)
+    assert len(user_public_key) == 33
+    assert isinstance(user_address, str)
+    assert re.match(r'^(?:0[xX])?[0-9a-fA-F]{40}$', user_address)
+    public_key = PublicKey(user_public_key)
+    if not public_key.verify(signature, unsigned):
+        return False
+
+    if get_address(public_key) != user_address:
+        return False
+
+    if id != hashlib.sha256(signed).hexdigest():
+        return False
+    remember_verified(id, signature)
+    return True
+
+
+@functools.lru_cache()
+def get_verify_executor() -> concurrent.futures.ProcessPoolExecutor:
+    return concurrent.futures.ProcessPoolExecutor(max_workers=VERIFY_WORKERS)
+
+
+def verify_moves(moves: Sequence['Move'],
+                 parallel: bool=False) -> List[bool]:
+    """
+    Check if the given moves are valid or not.  If there are many moves,
+    they can be verified across :const:`VERIFY_WORKERS` processes.
+
+    :param    moves: :class:`Move` objects to verify.
+    :param parallel: check if you want to verify many moves in a process
+                     pool.  keep it off in request handlers, since forking
+                     a pool in a gevent worker can hang it.
+    :return: whether each move is valid or not, in the given order.
+    """
+    if not parallel or VERIFY_WORKERS <= 1 or \
+       len(moves) < PARALLEL_VERIFY_THRESHOLD:
+        return [move.valid for move in moves]
+    results = [False] * len(moves)
+    unverified = []
+    for i, move in enumerate(moves):
+        if not move.signature:
+            continue
+        args = move._verification_args()
+        if is_verified(args[0], args[3], args[5]):
+            results[i] = True
+        else:
+            unverified.append((i, args))
+    if not unverified:
+        return results
+    verified = get_verify_executor().map(
+        verify_move,
+        *zip(*(args for _, args in unverified)),
+        chunksize=max(1, len(unverified) // (VERIFY_WORKERS * 4)),
+    )
+    for (i, args), result in zip(unverified, verified):
+        results[i] = result
+        if result:
+            # workers remember verified moves only in their own processes.
+            remember_verified(args[0], args[3])
+    return results
+
+
 class Move(db.Model):
     """This object contain general move information."""
     __tablename__ = 'move'
@@ -72,6 +285,9 @@ class Move(db.Model):
         'move_details', 'value',
         creator=lambda k, v: MoveDetail(key=k, value=v)
     )
+    #: address of the move's counterparty (e.g., receiver of :class:`Send`).
+    #: it is copied from details when the move is stored, to be indexed.
+    receiver = db.Column(db.String, nullable=True, index=True)
     #: move tax (not implemented yet)
     tax = db.Column(db.BigInteger, default=0, nullable=False)
     #: move creation datetime.
@@ -99,6 +315,9 @@ class Move(db.Model):
     def deserialize(cls, serialized: dict, block_id=None) -> 'Move':
         if block_id is None and serialized.get('block'):
             block_id = serialized['block'].get('id')
+        mapper = cls.__mapper__.polymorphic_map.get(serialized['name'])
+        if mapper:
+            cls = mapper.class_
         return cls(
             id=serialized['id'],
             user_address=serialized['user_address'],
@@ -116,25 +335,17 @@ class Move(db.Model):
         """Check if this object is valid or not"""
         if not self.signature:
             return False
+        return verify_move(*self._verification_args())
 
-        assert isinstance(self.signature, bytes)
-        assert 68 <= len(self.signature) <= 71
-        assert isinstance(self.user_public_key, bytes)
-        assert len(self.user_public_key) == 33
-        assert isinstance(self.user_address, str)
-        assert re.match(r'^(?:0[xX])?[0-9a-fA-F]{40}$', self.user_address)
-        public_key = PublicKey(self.user_public_key)
-        verified = public_key.verify(
+    def _verification_args(self) -> tuple:
+        return (
+            self.id,
+            self.user_public_key,
+            self.user_address,
             self.signature,
             self.serialize(include_signature=False),
+            self.serialize(include_signature=True),
         )
-        if not verified:
-            return False
-
-        if get_address(public_key) != self.user_address:
-            return False
-
-        return self.id == self.hash
 
     @property
     def confirmed(self):
@@ -238,6 +449,12 @@ class Move(db.Model):
         raise NotImplementedError()
 
 
+@db.event.listens_for(Move, 'before_insert', propagate=True)
+def set_receiver(mapper, connection, move: Move) -> None:
+    if move.name == 'send':
+        move.receiver = move.details.get('receiver')
+
+
 class MoveDetail(db.Model):
     """ This object contains move's key/value information. """
 
@@ -247,7 +464,10 @@ class MoveDetail(db.Model):
     move = db.relationship(Move, backref=db.backref(
         'move_details',
         collection_class=attribute_mapped_collection("key"),
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        # Load every detail of the queried moves at once (e.g., moves of
+        # a block, moves to replay) instead of a query per move.
+        lazy='selectin',
     ))
     #: MoveDetail's key
     key = db.Column(db.String, nullable=False, primary_key=True)
@@ -474,8 +694,17 @@ class Send(Move):
             from .user import Avatar
             receiver = Avatar.get(self.details['receiver'], self.block_id - 1)
 
+        # The receiver gets the items only if the sender could send them.
+        _, result = self.execute()
+        if result['result'] != 'success':
+            return receiver, dict(
+                type='receive',
+                result='fail',
+                message=result['message'],
+            )
+
         for i in range(int(self.details['amount'])):
-            receiver.get_item(self.details['item_name'])
+            receiver.get_item(self.details['item_index'])
 
         return receiver, dict(
             type='receive',
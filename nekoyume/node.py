@@ -1,11 +1,29 @@
+import concurrent.futures
 import datetime
+import os
+from typing import Iterable, List, Mapping, Optional
 
-from requests import get
-from requests.exceptions import ConnectionError, Timeout
+from requests.exceptions import ConnectionError, RequestException, Timeout
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm.session import Session
 
 from .orm import db
+from .peer import get
+
+
+#: Seconds to wait before retrying a node which failed once.  It doubles
+#: on every consecutive failure.
+NODE_BACKOFF_BASE: float = float(os.environ.get('NODE_BACKOFF_BASE', 10))
+#: Maximum seconds to wait before retrying a node.
+NODE_BACKOFF_MAX: float = float(os.environ.get('NODE_BACKOFF_MAX', 3600))
+#: Weight of the latest latency in :attr:`Node.latency`.
+LATENCY_EWMA_ALPHA: float = 0.3
+#: Maximum number of nodes to ping at once while discovering nodes.
+DISCOVERY_WORKERS: int = int(os.environ.get('DISCOVERY_WORKERS', 32))
+#: Seconds to wait for a node to answer a ping while discovering nodes.
+DISCOVERY_TIMEOUT: float = float(os.environ.get('DISCOVERY_TIMEOUT', 1))
 
 
 class Node(db.Model):
@@ -15,9 +33,19 @@ class Node(db.Model):
     url = db.Column(db.String, primary_key=True)
     #: last connected datetime of the node
     last_connected_at = db.Column(db.DateTime, nullable=False, index=True)
+    #: number of successful requests to the node
+    success_count = db.Column(db.Integer, nullable=False, default=0)
+    #: number of consecutive failed requests to the node
+    failure_count = db.Column(db.Integer, nullable=False, default=0)
+    #: exponentially weighted moving average of response time in seconds
+    latency = db.Column(db.Float, nullable=True)
+    #: the node is skipped until this datetime since it failed
+    retry_at = db.Column(db.DateTime, nullable=True)
 
     get_nodes_endpoint = '/nodes'
     get_blocks_endpoint = '/blocks'
+    get_headers_endpoint = '/blocks/headers'
+    locate_endpoint = '/blocks/locate'
 
     @classmethod
     def get(cls, url: str, session: Session=db.session):
@@ -44,23 +72,180 @@ class Node(db.Model):
     def update(cls, node: 'Node'):
         """
         Update recent node list by scrapping other nodes' information.
+        Nodes being backed off from are skipped.  Unknown nodes are pinged
+        concurrently, and reachable ones are inserted at once.
         """
+        if node.down:
+            return
         try:
             response = get(f"{node.url}{Node.get_nodes_endpoint}")
         except (ConnectionError, Timeout):
+            node.record_failure()
+            db.session.commit()
             return
-        for url in response.json()['nodes']:
-            try:
-                Node.get(url)
-            except (ConnectionError, Timeout):
-                continue
+        node.record_success(response.elapsed.total_seconds())
         db.session.commit()
+        known = {url for url, in db.session.query(Node.url)}
+        urls = [url for url in dict.fromkeys(response.json()['nodes'])
+                if url not in known]
+        cls.insert_many(discover(urls))
+
+    @classmethod
+    def insert_many(cls, rows: List[Mapping[str, object]]):
+        """
+        Insert nodes in a single statement, ignoring the ones which are
+        inserted already.
+
+        :param rows: mappings of node columns, e.g., ``url`` and
+                     ``last_connected_at``.
+        """
+        if not rows:
+            return
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            stmt = postgresql.insert(cls.__table__).on_conflict_do_nothing()
+        elif dialect == 'sqlite':
+            stmt = cls.__table__.insert().prefix_with('OR IGNORE')
+        else:
+            stmt = cls.__table__.insert()
+        db.session.execute(stmt, rows)
+        db.session.commit()
+
+    @hybrid_property
+    def down(self) -> bool:
+        """Whether the node is waiting to be retried after failures."""
+        return (self.retry_at is not None and
+                self.retry_at > datetime.datetime.utcnow())
+
+    @down.expression
+    def down(cls):
+        return db.and_(cls.retry_at.isnot(None),
+                       cls.retry_at > datetime.datetime.utcnow())
+
+    def record_success(self, latency: float):
+        """
+        Record a successful request to the node.
+
+        :param latency: seconds the node took to respond.
+        """
+        self.last_connected_at = datetime.datetime.utcnow()
+        self.success_count = (self.success_count or 0) + 1
+        self.failure_count = 0
+        self.retry_at = None
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_EWMA_ALPHA * (latency - self.latency)
+
+    def record_failure(self):
+        """
+        Record a failed request to the node, and back off from it for
+        :const:`NODE_BACKOFF_BASE` seconds doubled on every consecutive
+        failure, up to :const:`NODE_BACKOFF_MAX` seconds.
+        """
+        self.failure_count = (self.failure_count or 0) + 1
+        self.retry_at = (datetime.datetime.utcnow() +
+                         backoff(self.failure_count))
+
+    @classmethod
+    def record_many(cls, latencies: Mapping[str, Optional[float]],
+                    session: Session=db.session):
+        """
+        Record requests to many nodes the same as :meth:`record_success`
+        and :meth:`record_failure`, but with a single UPDATE statement for
+        the successful ones and another for the failed ones.
+
+        :param latencies: seconds each node took to respond by its url, or
+                          :const:`None` if the request to it failed.
+        :param   session: Database session to update nodes.
+        """
+        now = datetime.datetime.utcnow()
+        succeeded = {url: latency for url, latency in latencies.items()
+                     if latency is not None}
+        failed = [url for url, latency in latencies.items()
+                  if latency is None]
+        if succeeded:
+            latency = db.case([(cls.url == url, latency)
+                               for url, latency in succeeded.items()])
+            session.query(cls).filter(cls.url.in_(succeeded)).update({
+                cls.last_connected_at: now,
+                cls.success_count: cls.success_count + 1,
+                cls.failure_count: 0,
+                cls.retry_at: None,
+                cls.latency: db.func.coalesce(
+                    cls.latency + LATENCY_EWMA_ALPHA * (latency - cls.latency),
+                    latency
+                ),
+            }, synchronize_session=False)
+        if failed:
+            # Backoffs are computed for each count of failures until they
+            # reach NODE_BACKOFF_MAX, not to rely on SQL functions.
+            retry_at = []
+            for count in range(1, 64):
+                delay = backoff(count)
+                retry_at.append((cls.failure_count == count - 1, now + delay))
+                if delay.total_seconds() >= NODE_BACKOFF_MAX:
+                    break
+            session.query(cls).filter(cls.url.in_(failed)).update({
+                cls.failure_count: cls.failure_count + 1,
+                cls.retry_at: db.case(
+                    retry_at,
+                    else_=now + datetime.timedelta(seconds=NODE_BACKOFF_MAX)
+                ),
+            }, synchronize_session=False)
 
     def ping(self):
         try:
-            result = get(f'{self.url}/ping').text == 'pong'
-            if result:
-                self.last_connected_at = datetime.datetime.utcnow()
-            return result
+            response = get(f'{self.url}/ping')
         except (ConnectionError, Timeout):
+            self.record_failure()
             return False
+        result = response.text == 'pong'
+        if result:
+            self.record_success(response.elapsed.total_seconds())
+        else:
+            self.record_failure()
+        return result
+
+
+def backoff(failure_count: int) -> datetime.timedelta:
+    """
+    Get how long to back off from a node after the given number of
+    consecutive failures.
+
+    :param failure_count: number of consecutive failed requests.
+    """
+    return datetime.timedelta(seconds=min(
+        NODE_BACKOFF_MAX, NODE_BACKOFF_BASE * 2 ** (failure_count - 1)
+    ))
+
+
+def discover(urls: Iterable[str]) -> List[Mapping[str, object]]:
+    """
+    Ping nodes concurrently using up to :const:`DISCOVERY_WORKERS` threads,
+    waiting :const:`DISCOVERY_TIMEOUT` seconds for each.
+
+    :param urls: urls of nodes to ping.
+    :return: rows of reachable nodes to insert with :meth:`Node.insert_many`.
+    """
+    def ping(url: str) -> Optional[Mapping[str, object]]:
+        try:
+            response = get(f'{url}/ping', timeout=DISCOVERY_TIMEOUT)
+        except RequestException:
+            return None
+        if response.text != 'pong':
+            return None
+        return {
+            'url': url,
+            'last_connected_at': datetime.datetime.utcnow(),
+            'success_count': 1,
+            'failure_count': 0,
+            'latency': response.elapsed.total_seconds(),
+        }
+
+    urls = list(urls)
+    if not urls:
+        return []
+    workers = min(DISCOVERY_WORKERS, len(urls))
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        return [row for row in executor.map(ping, urls) if row]
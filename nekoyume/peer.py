@@ -0,0 +1,86 @@
+"""
+Peer
+====
+
+`peer.py` contains the HTTP client to communicate with other nodes.
+Every request goes through a :class:`requests.Session` per thread, sharing
+connections kept alive in a pool per host, and times out after
+:const:`PEER_TIMEOUT` seconds unless a timeout is given.  Bulk requests,
+which peers take long to answer, wait :const:`PEER_BULK_TIMEOUT` seconds
+for data instead.
+"""
+import os
+import threading
+from typing import Optional
+
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+
+
+__all__ = (
+    'PEER_BULK_TIMEOUT',
+    'PEER_HOSTS',
+    'PEER_POOL_SIZE',
+    'PEER_TIMEOUT',
+    'get',
+    'get_adapter',
+    'get_session',
+    'post',
+)
+
+#: Seconds to wait for a peer to connect or send data.
+PEER_TIMEOUT: float = float(os.environ.get('PEER_TIMEOUT', 3))
+#: Seconds to wait for a peer to send data of bulk requests, e.g., pages
+#: of blocks to sync, or batches of blocks it verifies before answering.
+PEER_BULK_TIMEOUT: float = float(os.environ.get('PEER_BULK_TIMEOUT', 60))
+#: Number of connections to keep alive for each peer.
+PEER_POOL_SIZE: int = int(os.environ.get('PEER_POOL_SIZE', 10))
+#: Number of peers to keep connection pools for.  Pools of the least
+#: recently used peers are closed beyond it.
+PEER_HOSTS: int = int(os.environ.get('PEER_HOSTS', 256))
+
+_adapter: Optional[HTTPAdapter] = None
+_adapter_pid: Optional[int] = None
+_adapter_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_adapter() -> HTTPAdapter:
+    """
+    Get the adapter shared by the current process, which pools
+    connections.  A forked process, e.g., a Celery worker, makes its own
+    one not to share connections.
+    """
+    global _adapter, _adapter_pid
+    with _adapter_lock:
+        if _adapter is None or _adapter_pid != os.getpid():
+            _adapter = HTTPAdapter(pool_connections=PEER_HOSTS,
+                                   pool_maxsize=PEER_POOL_SIZE)
+            _adapter_pid = os.getpid()
+        return _adapter
+
+
+def get_session() -> Session:
+    """
+    Get the session of the current thread.  Sessions aren't thread-safe,
+    but all of them share the connection pools of :func:`get_adapter`.
+    """
+    adapter = get_adapter()
+    if getattr(_local, 'adapter', None) is not adapter:
+        session = Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session, _local.adapter = session, adapter
+    return _local.session
+
+
+def get(url: str, **kwargs) -> Response:
+    """Same as :func:`requests.get()`, but through the pooled session."""
+    kwargs.setdefault('timeout', PEER_TIMEOUT)
+    return get_session().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> Response:
+    """Same as :func:`requests.post()`, but through the pooled session."""
+    kwargs.setdefault('timeout', PEER_TIMEOUT)
+    return get_session().post(url, **kwargs)
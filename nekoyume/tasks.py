@@ -1,7 +1,17 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
 from celery import Celery
+from flask import current_app
 
 from .block import Block
-from .broadcast import broadcast_block, broadcast_move, multicast
+from .broadcast import (
+    BROADCAST_LIMIT,
+    broadcast_block,
+    broadcast_moves,
+    multicast,
+)
 from .move import Move
 from .node import Node
 from .orm import db
@@ -9,23 +19,70 @@ from .orm import db
 
 celery = Celery()
 
+#: Seconds to buffer new moves to relay them to each node as a bundle.
+#: 0 relays every move as soon as it's accepted.
+MOVE_RELAY_WINDOW: float = float(os.environ.get('MOVE_RELAY_WINDOW', 1))
+
+_relay_buffer: Dict[Tuple[Optional[str], str], List[str]] = {}
+_relay_lock = threading.Lock()
+
 
 @celery.task()
-def move_broadcast(move_id, sent_node_url, my_node_url, session=db.session):
-    move = session.query(Move).get(move_id)
-    if not move:
+def moves_broadcast(move_ids, sent_node_url, my_node_url,
+                    session=db.session):
+    moves = session.query(Move).filter(Move.id.in_(move_ids)).all()
+    for offset in range(0, len(moves), BROADCAST_LIMIT):
+        serialized = {
+            'moves': [
+                move.serialize(
+                    use_bencode=False,
+                    include_signature=True,
+                    include_id=True,
+                )
+                for move in moves[offset:offset + BROADCAST_LIMIT]
+            ],
+        }
+        multicast(
+            serialized=serialized,
+            sent_node=Node(url=sent_node_url),
+            my_node=Node(url=my_node_url),
+            broadcast=broadcast_moves,
+        )
+
+
+def relay_move(move_id: str, sent_node_url: Optional[str],
+               my_node_url: str) -> None:
+    """
+    Relay a new move to other nodes.  Moves accepted within
+    :const:`MOVE_RELAY_WINDOW` seconds are bundled, so that a burst of
+    moves costs a single :func:`moves_broadcast` task and a request per
+    node.
+
+    :param       move_id: id of the accepted :class:`nekoyume.move.Move`.
+    :param sent_node_url: url of the node which sent the move, if any.
+    :param   my_node_url: url of this node.
+    """
+    if MOVE_RELAY_WINDOW <= 0:
+        moves_broadcast.delay([move_id], sent_node_url, my_node_url)
         return
-    serialized = move.serialize(
-        use_bencode=False,
-        include_signature=True,
-        include_id=True,
-    )
-    multicast(
-        serialized=serialized,
-        sent_node=Node(url=sent_node_url),
-        my_node=Node(url=my_node_url),
-        broadcast=broadcast_move,
-    )
+    key = sent_node_url, my_node_url
+    with _relay_lock:
+        pending = _relay_buffer.setdefault(key, [])
+        pending.append(move_id)
+        if len(pending) > 1:
+            return
+    timer = threading.Timer(MOVE_RELAY_WINDOW, _flush_moves,
+                            (current_app._get_current_object(), key))
+    timer.daemon = True
+    timer.start()
+
+
+def _flush_moves(app, key: Tuple[Optional[str], str]) -> None:
+    with _relay_lock:
+        move_ids = _relay_buffer.pop(key, [])
+    if move_ids:
+        with app.app_context():
+            moves_broadcast.delay(move_ids, *key)
 
 
 @celery.task()
@@ -45,3 +102,11 @@ def block_broadcast(block_id, sent_node_url, my_node_url, session=db.session):
         my_node=Node(url=my_node_url),
         broadcast=broadcast_block,
     )
+
+
+@celery.task()
+def block_sync(session=db.session):
+    # Request handlers which find our chain behind leave syncing to this,
+    # not to block the request and fork processes in the web worker.
+    node = session.query(Node).order_by(Node.last_connected_at.desc()).first()
+    Block.sync(node, session, parallel=False)
@@ -1,10 +1,14 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 import datetime
-from typing import List
+import logging
+import os
+import pickle
+from typing import List, Optional
 
 from coincurve import PrivateKey, PublicKey
 from flask_caching import Cache
 from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 
 from .battle.enums import ItemType
 from .exc import InvalidMoveError, InvalidNameError
@@ -16,7 +20,6 @@ from .move import (
     HackAndSlash,
     LevelUp,
     Move,
-    MoveDetail,
     MoveZone,
     Say,
     Sell,
@@ -29,6 +32,21 @@ from .util import get_address
 
 
 cache = Cache()
+logger = logging.getLogger(__name__)
+
+#: Number of replayed moves which makes :meth:`Avatar.replay` store
+#: a snapshot.
+AVATAR_SNAPSHOT_INTERVAL: int = int(
+    os.environ.get('AVATAR_SNAPSHOT_INTERVAL', 10)
+)
+#: Number of the latest snapshots to keep for each avatar.
+AVATAR_SNAPSHOT_LIMIT: int = int(
+    os.environ.get('AVATAR_SNAPSHOT_LIMIT', 10)
+)
+#: Seconds to keep an avatar in the cache since it was replayed.
+AVATAR_CACHE_TIMEOUT: int = int(
+    os.environ.get('AVATAR_CACHE_TIMEOUT', 60 * 60 * 24)
+)
 
 
 class User():
@@ -180,16 +198,65 @@ class Avatar:
     gravatar_hash: str = 'HASH'
 
     @classmethod
-    @cache.memoize(timeout=0)
     def get(cls, user_addr, block_id, session=db.session):
         """
         get avatar.
 
+        The avatar is cached by the last block which touched the user
+        (i.e., the user's moves, items sent to the user and blocks the user
+        created), so the cache misses only when such a block is added.
+
+        :params user_addr: Avatar's user address
+        :params  block_id: Avatar's block timing
+        :params   session: Database session to get data
+        """
+        from .block import Block, CreatorCount
+        last_move_block_id = session.query(db.func.max(Move.block_id)).filter(
+            or_(Move.user_address == user_addr, Move.receiver == user_addr),
+            Move.block_id <= block_id,
+        ).scalar()
+        if last_move_block_id is None:
+            return None
+        last_count = CreatorCount.last(user_addr, block_id, session)
+        touched_block_id = max(
+            last_move_block_id,
+            last_count.block_id if last_count else 0,
+        )
+        touched_block_hash = session.query(Block.hash).filter(
+            Block.id == touched_block_id
+        ).scalar()
+        key = f'avatar/{user_addr}/{touched_block_id}/{touched_block_hash}'
+        cached = cache.get(key)
+        if cached is None:
+            avatar = cls.replay(user_addr, touched_block_id, session)
+            if avatar is None:
+                return None
+            # Blocks can't be pickled along with their moves.
+            cached = (
+                avatar.current_block.id,
+                replace(avatar, current_block=None),
+            )
+            # Only misses are written, not to turn reads into disk writes
+            # on the filesystem cache.  The least recently used entries
+            # are evicted beyond CACHE_THRESHOLD, or redis's maxmemory.
+            cache.set(key, cached, timeout=AVATAR_CACHE_TIMEOUT)
+        current_block_id, avatar = cached
+        avatar.current_block = session.query(Block).get(current_block_id)
+        return avatar
+
+    @classmethod
+    def replay(cls, user_addr, block_id, session=db.session):
+        """
+        get avatar without cache.
+
+        It starts from the nearest :class:`AvatarSnapshot` at or below
+        the given block and replays only the moves after it.
+
         :params user_addr: Avatar's user address
         :params  block_id: Avatar's block timing
         :params   session: Database session to get data
         """
-        from .block import Block
+        from .block import Block, CreatorCount
         create_move = session.query(Move).filter(
             Move.user_address == user_addr,
             Move.block_id <= block_id
@@ -200,27 +267,42 @@ class Avatar:
         ).first()
         if not create_move or block_id < create_move.block_id:
             return None
+        snapshot = session.query(AvatarSnapshot).filter(
+            AvatarSnapshot.user_address == user_addr,
+            AvatarSnapshot.block_id >= create_move.block_id,
+            AvatarSnapshot.block_id <= block_id,
+        ).order_by(AvatarSnapshot.block_id.desc()).first()
         moves = session.query(Move).filter(
-            or_(Move.user_address == user_addr, Move.id.in_(
-                    db.session.query(MoveDetail.move_id).filter_by(
-                        key='receiver', value=user_addr)))
+            or_(Move.user_address == user_addr, Move.receiver == user_addr)
         ).filter(
-            Move.block_id >= create_move.block_id,
             Move.block_id <= block_id
-        ).order_by(Move.block_id.asc())
-        avatar, result = create_move.execute(None)
-        gold_added = session.query(Block).filter_by(
-            creator=user_addr
-        ).filter(Block.id <= block_id).count() * 8
-        avatar.gold += gold_added
+        ).order_by(Move.block_id.asc()).options(db.joinedload(Move.block))
+        created_blocks = CreatorCount.get(user_addr, block_id, session)
+        if snapshot:
+            avatar = snapshot.load(create_move.block)
+            if snapshot.block_id == block_id:
+                return avatar
+            moves = moves.filter(Move.block_id > snapshot.block_id)
+            created_blocks -= CreatorCount.get(user_addr, snapshot.block_id,
+                                               session)
+        else:
+            avatar, result = create_move.execute(None)
+            moves = moves.filter(Move.block_id >= create_move.block_id)
+        avatar.gold += created_blocks * 8
 
+        replayed = 0
         for move in moves:
             if move.user_address == user_addr:
                 avatar, result = move.execute(avatar)
-            if (type(move) == Send and
-               move.details['receiver'] == user_addr):
+            if type(move) == Send and move.receiver == user_addr:
                 avatar, result = move.receive(avatar)
+            replayed += 1
 
+        if (replayed >= AVATAR_SNAPSHOT_INTERVAL and
+           session.query(Block).get(block_id)):
+            # Avatars are replayed while reading as well, so the snapshot
+            # is committed along with the caller's transaction.
+            AvatarSnapshot.store(avatar, block_id, session, commit=False)
         return avatar
 
     def get_item(self, item):
@@ -285,3 +367,109 @@ class Avatar:
             if self.level >= v.unlock_level:
                 zone_list.append(k)
         return zone_list
+
+
+class AvatarSnapshot(db.Model):
+    """This object contains a materialized :class:`Avatar` at a block."""
+
+    __tablename__ = 'avatar_snapshot'
+    #: avatar's user address
+    user_address = db.Column(db.String, primary_key=True)
+    #: block id which the avatar was materialized at
+    block_id = db.Column(db.Integer, primary_key=True, index=True)
+    #: pickled avatar
+    avatar = db.Column(db.LargeBinary, nullable=False)
+
+    @classmethod
+    def store(cls, avatar: Avatar, block_id: int,
+              session=db.session,
+              commit: bool=True) -> Optional['AvatarSnapshot']:
+        """
+        store the given avatar as a snapshot.  Only the latest
+        :const:`AVATAR_SNAPSHOT_LIMIT` snapshots of the avatar are kept.
+
+        :params   avatar: Avatar to store
+        :params block_id: Block id which the avatar was materialized at
+        :params  session: Database session to store data
+        :params   commit: commit in this function automatically or not
+        """
+        snapshot = session.merge(cls(
+            user_address=avatar.user,
+            block_id=block_id,
+            avatar=pickle.dumps(replace(avatar, current_block=None)),
+        ))
+        oldest_block_id = session.query(cls.block_id).filter(
+            cls.user_address == avatar.user
+        ).order_by(cls.block_id.desc()).offset(
+            AVATAR_SNAPSHOT_LIMIT - 1
+        ).limit(1).scalar()
+        if oldest_block_id is not None:
+            session.query(cls).filter(
+                cls.user_address == avatar.user,
+                cls.block_id < oldest_block_id,
+            ).delete(synchronize_session='fetch')
+        if commit:
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                return None
+        return snapshot
+
+    @classmethod
+    def materialize(cls, block, session=db.session,
+                    commit: bool=True) -> None:
+        """
+        apply the moves of a newly committed block to the avatars they touch
+        and store the results, so that :meth:`Avatar.get` for the block is
+        a single lookup.  It should be called after the block is committed.
+
+        The block is part of the chain already, so an avatar which fails to
+        be replayed is only logged and left to :meth:`Avatar.get`.
+
+        :params   block: Committed :class:`nekoyume.block.Block`
+        :params session: Database session to store data
+        :params  commit: commit in this function automatically or not
+        """
+        addresses = {block.creator}
+        for move in block.moves:
+            addresses.add(move.user_address)
+            if move.receiver:
+                addresses.add(move.receiver)
+        for address in sorted(addresses):
+            try:
+                avatar = Avatar.replay(address, block.id, session)
+            except Exception:
+                logger.exception('Failed to materialize the avatar of %s '
+                                 'at block #%d.', address, block.id)
+                continue
+            if avatar:
+                cls.store(avatar, block.id, session, commit=False)
+        if commit:
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+
+    @classmethod
+    def truncate(cls, block_id: int, session=db.session) -> None:
+        """
+        remove every snapshot above the given block.
+        It should be called when blocks are rolled back.
+
+        :params block_id: Last block id to keep snapshots
+        :params  session: Database session to remove data
+        """
+        session.query(cls).filter(
+            cls.block_id > block_id
+        ).delete(synchronize_session=False)
+
+    def load(self, current_block) -> Avatar:
+        """
+        restore the avatar from this snapshot.
+
+        :params current_block: Block of the avatar's creation move
+        """
+        avatar = pickle.loads(self.avatar)
+        avatar.current_block = current_block
+        return avatar
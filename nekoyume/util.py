@@ -1,6 +1,8 @@
 import datetime
 import functools
-from typing import Callable
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, TypeVar
 
 from coincurve import PublicKey
 from iso8601 import parse_date
@@ -9,6 +11,9 @@ from keccak import sha3_256
 from nekoyume.exc import InvalidMoveError
 
 
+T = TypeVar('T')
+
+
 def get_address(public_key: PublicKey) -> str:
     """Derive an Ethereum-style address from the given public key."""
     return '0x' + sha3_256(public_key.format(False)[1:]).hexdigest()[-40:]
@@ -29,3 +34,50 @@ def deserialize_datetime(serialized: str) -> datetime.datetime:
     parsed = parse_date(serialized)
     deserialized = parsed.replace(tzinfo=None)
     return deserialized
+
+
+def prefetch(iterable: Iterable[T], size: int=1) -> Iterator[T]:
+    """
+    Iterate over the given iterable in a background thread, keeping up to
+    *size* items ahead of the consumer.  Chaining it makes a pipeline whose
+    stages run concurrently, e.g., ``prefetch(map(g, prefetch(f())))``.
+    An exception raised by the iterable is raised again to the consumer,
+    and closing the iterator stops the thread.
+
+    :param iterable: iterable to consume in the background.
+    :param     size: maximum number of items to keep ahead.
+    """
+    items = queue.Queue(maxsize=size)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((done, e))
+        else:
+            put((done, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
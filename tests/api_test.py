@@ -1,4 +1,6 @@
 import json
+import typing
+import unittest.mock
 
 from flask.testing import FlaskClient
 from pytest import mark
@@ -8,6 +10,7 @@ from sqlalchemy.orm.scoping import scoped_session
 from typeguard import typechecked
 
 from nekoyume.block import Block
+from nekoyume.move import Move
 from nekoyume.node import Node
 from nekoyume.user import User
 
@@ -40,6 +43,38 @@ def test_get_blocks(fx_test_client, fx_user):
     assert block.hash.encode() in rv.data
 
 
+def test_get_headers(fx_test_client: FlaskClient, fx_user: User):
+    move = fx_user.sleep()
+    blocks = [Block.create(fx_user, [move]), Block.create(fx_user, []),
+              Block.create(fx_user, [])]
+    rv = fx_test_client.get('/blocks/headers?from=2')
+    assert rv.status == '200 OK'
+    headers = json.loads(rv.get_data())['headers']
+    assert [h['hash'] for h in headers] == [b.hash for b in blocks[1:]]
+    assert all('moves' not in h for h in headers)
+    assert Block.deserialize(headers[0]).validate_header(blocks[:1])
+    rv = fx_test_client.get('/blocks/headers?from=1&to=1')
+    assert [h['hash'] for h in json.loads(rv.get_data())['headers']] == \
+        [blocks[0].hash]
+
+
+def test_locate_block(fx_test_client: FlaskClient, fx_user: User):
+    blocks = [Block.create(fx_user, []) for _ in range(3)]
+
+    def locate(locator):
+        rv = fx_test_client.post('/blocks/locate',
+                                 data=json.dumps({'locator': locator}),
+                                 content_type='application/json')
+        assert rv.status == '200 OK'
+        return json.loads(rv.get_data())['block_id']
+
+    assert locate(['0' * 64, blocks[1].hash, blocks[0].hash]) == 2
+    assert locate(['0' * 64]) == 0
+    rv = fx_test_client.post('/blocks/locate', data=json.dumps({}),
+                             content_type='application/json')
+    assert rv.status_code == 400
+
+
 @typechecked
 def test_post_block_return_block_id(fx_test_client: FlaskClient,
                                     fx_user: User,
@@ -62,6 +97,24 @@ def test_post_block_return_block_id(fx_test_client: FlaskClient,
     assert data['block_id'] == 2
 
 
+def test_post_block_sync_in_task(fx_test_client: FlaskClient,
+                                 fx_user: User):
+    block = Block.create(fx_user, [])
+    des = block.serialize(use_bencode=False,
+                          include_suffix=True,
+                          include_moves=True,
+                          include_hash=True)
+    des['id'] = 3
+    with unittest.mock.patch('nekoyume.api.block_sync') as block_sync, \
+            unittest.mock.patch.object(Block, 'sync') as sync:
+        resp = fx_test_client.post('/blocks', data=json.dumps(des),
+                                   content_type='application/json')
+    assert resp.status_code == 403
+    # a lagging node syncs in a task, not to block the request.
+    assert block_sync.delay.called
+    assert not sync.called
+
+
 @typechecked
 def test_post_node(fx_test_client: FlaskClient, fx_session: scoped_session):
     url = 'http://test.neko'
@@ -156,3 +209,93 @@ def test_get_version(fx_test_client: FlaskClient):
     res = fx_test_client.get('/version/')
     assert res.status_code == 200
     assert json.loads(res.get_data()) == ''
+
+
+def test_post_blocks(fx_test_client: FlaskClient, fx_user: User,
+                     fx_session: scoped_session):
+    blocks = [Block.create(fx_user, []) for _ in range(3)]
+    fx_session.add_all(blocks)
+    fx_session.commit()
+    serialized = [b.serialize(use_bencode=False,
+                              include_suffix=True,
+                              include_moves=True,
+                              include_hash=True) for b in blocks]
+    for block in blocks[1:]:
+        fx_session.delete(block)
+    fx_session.commit()
+
+    def post(blocks):
+        res = fx_test_client.post('/blocks/batch', data=json.dumps(blocks),
+                                  content_type='application/json')
+        return res.status_code, json.loads(res.get_data())
+
+    status, data = post(serialized[2:])
+    assert status == 403
+    assert data['block_id'] == 1
+    invalid = [dict(serialized[1]), serialized[2]]
+    invalid[0]['suffix'] = '00'
+    assert post(invalid)[0] == 400
+    assert fx_session.query(Block).count() == 1
+    assert post(serialized) == (200, {'result': 'success'})
+    assert [b.hash for b in fx_session.query(Block).order_by(Block.id)] == \
+        [s['hash'] for s in serialized]
+    # blocks we have already are ignored.
+    assert post(serialized) == (200, {'result': 'success'})
+    assert post([]) == (400, {'result': 'failed',
+                              'message': 'empty blocks.'})
+    invalid_parameter = (400, {'result': 'failed',
+                               'message': 'Invalid parameter.'})
+    assert post(['block']) == invalid_parameter
+    assert post([{'hash': 'abc'}]) == invalid_parameter
+    assert post([{'id': 4}]) == invalid_parameter
+    assert post([{'id': 4, 'prev_hash': serialized[2]['hash']}]) == \
+        invalid_parameter
+    with unittest.mock.patch('nekoyume.api.BROADCAST_LIMIT', 2), \
+            unittest.mock.patch.object(Block, 'extend_chain') as extend:
+        assert post(['block'] * 3) == (400, {'result': 'failed',
+                                             'message': 'too many blocks.'})
+    assert not extend.called
+
+
+def test_post_moves(fx_test_client: FlaskClient, fx_user: User,
+                    fx_session: scoped_session,
+                    fx_novice_status: typing.Mapping[str, str]):
+    moves = [fx_user.create_novice(fx_novice_status), fx_user.say('hi'),
+             fx_user.say('bye')]
+    serialized = [m.serialize(use_bencode=False,
+                              include_signature=True,
+                              include_id=True) for m in moves]
+    for move in moves[1:]:
+        fx_session.delete(move)
+    fx_session.commit()
+    invalid = dict(serialized[2], signature=serialized[0]['signature'])
+
+    def post(bundle):
+        res = fx_test_client.post('/moves/batch', data=json.dumps(bundle),
+                                  content_type='application/json')
+        return res.status_code, json.loads(res.get_data())
+
+    with unittest.mock.patch('nekoyume.api.relay_move') as m:
+        status, data = post({'moves': [serialized[0], serialized[1], invalid],
+                             'sent_node': 'http://test.neko'})
+        assert status == 400
+        assert data['accepted'] == [moves[1].id]
+        assert data['invalid'] == [moves[2].id]
+        m.assert_called_once_with(moves[1].id,
+                                  sent_node_url='http://test.neko',
+                                  my_node_url='http://localhost')
+        assert post({'moves': serialized}) == (200, {
+            'result': 'success',
+            'accepted': [moves[2].id],
+        })
+    assert fx_session.query(Move).count() == 3
+    assert post({}) == (400, {'result': 'failed', 'message': 'empty moves.'})
+    incomplete = dict(serialized[0], id='0' * 64)
+    del incomplete['signature']
+    for bundle in [[serialized[0]], 'moves', {'moves': [{}]},
+                   {'moves': ['hi']}, {'moves': [{'id': ['hi']}]},
+                   {'moves': [incomplete]}]:
+        assert post(bundle) == (400, {
+            'result': 'failed',
+            'message': 'Invalid parameter.',
+        })
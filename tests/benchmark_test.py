@@ -0,0 +1,47 @@
+import json
+import multiprocessing
+import sys
+import unittest.mock
+
+from click.testing import CliRunner
+
+from nekoyume.benchmark import bench_check, bench_mint, generate_challenges
+from nekoyume.cli import cli
+from nekoyume.hashcash import _mint
+
+
+def test_bench_mint():
+    result = bench_mint(bits=8, challenge_size=32, rounds=3, seed=1)
+    assert result['attempts'] == sum(
+        int.from_bytes(_mint(challenge, 8), sys.byteorder)
+        for challenge in generate_challenges(32, 3, seed=1)
+    )
+    assert result['hashes_per_second'] > 0
+    assert result['time_to_solution'] == result['seconds'] / 3
+    assert bench_check(32, number=10)['number'] == 10
+
+
+def test_bench_mint_workers():
+    with unittest.mock.patch('multiprocessing.Pool',
+                             wraps=multiprocessing.Pool) as pool:
+        result = bench_mint(bits=8, challenge_size=32, workers=2, rounds=3,
+                            seed=1)
+    # worker processes are started once, out of the measured time.
+    assert pool.call_count == 1
+    assert result['startup_seconds'] > 0
+    assert result['attempts'] == \
+        bench_mint(bits=8, challenge_size=32, rounds=3, seed=1)['attempts']
+
+
+def test_bench_hashcash_command():
+    result = CliRunner().invoke(cli, [
+        'bench-hashcash', '--bits', '4', '--size', '16', '--size', '32',
+        '--workers', '1', '--rounds', '1', '--output', '-',
+    ])
+    assert result.exit_code == 0
+    output = json.loads(result.output[result.output.index('{'):])
+    assert output['environment']['python']
+    assert [(r['benchmark'], r['challenge_size'])
+            for r in output['results']] == [
+        ('check', 16), ('mint', 16), ('check', 32), ('mint', 32),
+    ]
@@ -1,16 +1,29 @@
+import datetime
+import threading
 import typing
+import unittest.mock
 
 from pytest import mark, raises
 from pytest_localserver.http import WSGIServer
+from requests.exceptions import ConnectionError, Timeout
 from requests_mock import Mocker
+from sqlalchemy import inspect
 from sqlalchemy.orm.scoping import scoped_session
 from sqlalchemy.orm.session import Session
 from typeguard import typechecked
 
-from nekoyume.block import Block, find_branch_point
-from nekoyume.exc import NodeUnavailable
+from nekoyume.block import (
+    Block,
+    CreatorCount,
+    fetch_blocks,
+    find_branch_point,
+    locate_branch_point,
+    watch_tip,
+)
+from nekoyume.exc import InvalidMoveError, NodeUnavailable
 from nekoyume.move import Move
 from nekoyume.node import Node
+from nekoyume.peer import get
 from nekoyume.user import User
 
 
@@ -95,6 +108,8 @@ def test_sync_node_unaviable_on_branch_point(
             json={'block': serialized},
             status_code=200,
         )
+        # a node which doesn't support locators.
+        m.post(f'{fx_server.url}/blocks/locate', status_code=404)
         m.register_uri(
             'GET', f'{fx_server.url}/blocks/1',
             status_code=code,
@@ -126,6 +141,8 @@ def test_sync_node_unavailable_on_get_blocks(
             json={'block': serialized},
             status_code=200,
         )
+        # a node which doesn't support locators.
+        m.post(f'{fx_server.url}/blocks/locate', status_code=404)
         m.register_uri(
             'GET', f'{fx_server.url}/blocks/1',
             json={'block': serialized},
@@ -245,3 +262,196 @@ def test_find_branch_point_404(fx_session: scoped_session):
     with Mocker() as m:
         m.get('http://test.neko/blocks/1', status_code=404)
         assert find_branch_point(node, fx_session, 1, 1) == 0
+
+
+def test_creator_count(fx_user, fx_session, fx_other_user, fx_other_session,
+                       fx_server):
+    Block.create(fx_other_user, [])
+    assert CreatorCount.get(fx_other_user.address, 1, fx_other_session) == 1
+    for i in range(3):
+        Block.create(fx_user, [])
+    assert [CreatorCount.get(fx_user.address, i, fx_session)
+            for i in range(5)] == [0, 1, 2, 3, 3]
+
+    Block.sync(Node(url=fx_server.url), fx_other_session)
+    assert CreatorCount.get(fx_other_user.address, 3, fx_other_session) == 0
+    assert CreatorCount.get(fx_user.address, 3, fx_other_session) == 3
+
+
+def test_block_validate_with_window(fx_user: User):
+    blocks = [Block.create(fx_user, []) for _ in range(12)]
+    window = Block.window(blocks[-2].id)
+    assert [b.id for b in window] == list(range(2, 12))
+    with unittest.mock.patch.object(Block, 'query') as query:
+        assert blocks[-1].validate(window)
+        assert not query.get.called
+
+
+def test_create_cancelled_by_tip(fx_user: User, fx_session: scoped_session):
+    Block.create(fx_user, [])
+    cancel = threading.Event()
+    watcher = watch_tip(2, cancel, fx_session, interval=0.01)
+    assert not cancel.wait(0.1)
+    Block.create(fx_user, [])
+    assert cancel.wait(5)
+    watcher.join(5)
+    assert not watcher.is_alive()
+    with unittest.mock.patch('nekoyume.hashcash._search',
+                             return_value=None) as search:
+        assert Block.create(fx_user, [], cancel=cancel) is None
+        assert search.call_args[1]['stopped']()
+
+
+def test_sync_pipeline(fx_user: User, fx_session: scoped_session,
+                       fx_other_session: Session, fx_server: WSGIServer,
+                       fx_novice_status: typing.Mapping[str, str]):
+    move = fx_user.create_novice(fx_novice_status)
+    Block.create(fx_user, [move])
+    for _ in range(4):
+        Block.create(fx_user, [])
+    with unittest.mock.patch('nekoyume.block.SYNC_PAGE_SIZE', 2):
+        with unittest.mock.patch('nekoyume.block.get', wraps=get) as get_:
+            assert Block.sync(Node(url=fx_server.url), fx_other_session)
+    assert [b.hash for b in fx_other_session.query(Block).order_by(Block.id)] \
+        == [b.hash for b in fx_session.query(Block).order_by(Block.id)]
+    assert fx_other_session.query(Move).get(move.id)
+    pages = [c[1]['params'] for c in get_.call_args_list if 'params' in c[1]]
+    assert sorted(pages, key=lambda p: p['from']) == [
+        {'from': 1, 'to': 2}, {'from': 3, 'to': 4}, {'from': 5, 'to': 5},
+        {'from': 6, 'to': 7},
+    ]
+
+
+def test_sync_from_multiple_peers(fx_user: User, fx_session: scoped_session,
+                                  fx_other_session: Session,
+                                  fx_server: WSGIServer):
+    for _ in range(6):
+        Block.create(fx_user, [])
+    other_server = WSGIServer(application=fx_server.app)
+    other_server.start()
+    try:
+        fx_session.add_all([
+            Node(url=fx_server.url,
+                 last_connected_at=datetime.datetime.utcnow()),
+            Node(url=other_server.url,
+                 last_connected_at=datetime.datetime.utcnow()),
+        ])
+        fx_session.commit()
+        failed = []
+
+        def get_(url, params=None, **kwargs):
+            if params and params['from'] == 3 and not failed:
+                failed.append(url)
+                raise ConnectionError()
+            return get(url, params=params, **kwargs)
+
+        with unittest.mock.patch('nekoyume.block.SYNC_PAGE_SIZE', 2), \
+                unittest.mock.patch('nekoyume.block.get', wraps=get_) as m, \
+                unittest.mock.patch('nekoyume.block.fetch_blocks',
+                                    wraps=fetch_blocks) as fetch:
+            assert Block.sync(session=fx_other_session)
+    finally:
+        other_server.stop()
+    assert fx_other_session.query(Block).count() == 6
+    # peers read by other threads don't belong to the session.
+    assert all(inspect(n).transient for n, _ in fetch.call_args[0][0])
+    assert [n.success_count for n in fx_session.query(Node)] == [1, 1]
+    pages = [(c[0][0], c[1]['params']['from'])
+             for c in m.call_args_list if 'params' in c[1]]
+    assert {url.split('/blocks')[0] for url, _ in pages} == \
+        {fx_server.url, other_server.url}
+    # the failed page is retried against the other peer.
+    assert [url for url, from_ in pages if from_ == 3][1] != failed[0]
+
+
+def test_sync_invalid_move(fx_user: User, fx_session: scoped_session,
+                           fx_other_session: Session, fx_server: WSGIServer,
+                           fx_novice_status: typing.Mapping[str, str]):
+    move = fx_user.create_novice(fx_novice_status)
+    Block.create(fx_user, [move])
+    with unittest.mock.patch('nekoyume.block.verify_moves',
+                             return_value=[False]):
+        with raises(InvalidMoveError):
+            Block.sync(Node(url=fx_server.url), fx_other_session)
+    assert not fx_other_session.query(Block).count()
+
+
+def test_sync_keeps_blocks_when_peers_fail(
+        fx_user: User, fx_session: scoped_session, fx_other_user: User,
+        fx_other_session: Session, fx_server: WSGIServer
+):
+    for _ in range(3):
+        Block.create(fx_user, [])
+    Block.sync(Node(url=fx_server.url), fx_other_session)
+    Block.create(fx_other_user, [])
+    for _ in range(2):
+        Block.create(fx_user, [])
+    hashes = [b.hash
+              for b in fx_other_session.query(Block).order_by(Block.id)]
+    with unittest.mock.patch('nekoyume.block.fetch_page',
+                             side_effect=Timeout):
+        assert not Block.sync(Node(url=fx_server.url), fx_other_session)
+    # the fork is deleted only along with pages replacing it.
+    assert [b.hash
+            for b in fx_other_session.query(Block).order_by(Block.id)] == \
+        hashes
+
+
+def test_sync_headers_first(fx_user: User, fx_session: scoped_session,
+                            fx_other_user: User, fx_other_session: Session,
+                            fx_server: WSGIServer):
+    for _ in range(3):
+        Block.create(fx_user, [])
+    other_block = Block.create(fx_other_user, [])
+    with unittest.mock.patch.object(Block, 'validate_header',
+                                    return_value=False):
+        assert not Block.sync(Node(url=fx_server.url), fx_other_session,
+                              headers_first=True)
+    # the invalid chain doesn't replace our blocks.
+    assert fx_other_session.query(Block).one().hash == other_block.hash
+
+    with unittest.mock.patch('nekoyume.block.get', wraps=get) as get_:
+        assert Block.sync(Node(url=fx_server.url), fx_other_session,
+                          headers_first=True)
+    assert [b.hash for b in fx_other_session.query(Block).order_by(Block.id)] \
+        == [b.hash for b in fx_session.query(Block).order_by(Block.id)]
+    assert any(c[0][0].endswith('/blocks/headers')
+               for c in get_.call_args_list)
+
+
+def test_sync_headers_first_unsupported(
+        fx_user: User, fx_other_session: Session, fx_server: WSGIServer
+):
+    Block.create(fx_user, [])
+    with Mocker(real_http=True) as m:
+        m.get(f'{fx_server.url}/blocks/headers', json={'block': None})
+        assert Block.sync(Node(url=fx_server.url), fx_other_session,
+                          headers_first=True)
+    assert fx_other_session.query(Block).count() == 1
+
+
+def test_block_locator(fx_user: User, fx_session: scoped_session):
+    blocks = [Block.create(fx_user, []) for _ in range(15)]
+    ids = list(range(15, 5, -1)) + [4, 1]
+    assert Block.locator(15, fx_session) == \
+        [blocks[id_ - 1].hash for id_ in ids]
+    assert Block.locator(1, fx_session) == [blocks[0].hash]
+
+
+def test_sync_locate_branch_point(fx_user: User, fx_session: scoped_session,
+                                  fx_other_user: User,
+                                  fx_other_session: Session,
+                                  fx_server: WSGIServer):
+    node = Node(url=fx_server.url)
+    for _ in range(2):
+        Block.create(fx_user, [])
+    Block.sync(node, fx_other_session)
+    Block.create(fx_other_user, [])
+    for _ in range(2):
+        Block.create(fx_user, [])
+    assert locate_branch_point(node, fx_other_session, 3) == 2
+    with unittest.mock.patch('nekoyume.block.find_branch_point') as find:
+        assert Block.sync(node, fx_other_session)
+        assert not find.called
+    assert [b.hash for b in fx_other_session.query(Block).order_by(Block.id)] \
+        == [b.hash for b in fx_session.query(Block).order_by(Block.id)]
@@ -1,11 +1,12 @@
 import datetime
+import threading
 import typing
 import unittest.mock
 
 from flask import Flask
 from pytest import fixture, mark
 from pytest_localserver.http import WSGIServer
-from requests.exceptions import ConnectionError, Timeout
+from requests.exceptions import ConnectionError, ReadTimeout, Timeout
 from requests_mock import Mocker, mock
 from sqlalchemy.orm.scoping import scoped_session
 from sqlalchemy.orm.session import Session
@@ -15,11 +16,13 @@ from nekoyume.block import Block
 from nekoyume.broadcast import (
     broadcast_block,
     broadcast_move,
+    broadcast_moves,
     broadcast_node,
     multicast,
 )
 from nekoyume.move import Move
 from nekoyume.node import Node
+from nekoyume.peer import PEER_BULK_TIMEOUT, PEER_TIMEOUT, post as _post
 from nekoyume.user import User
 
 
@@ -139,6 +142,41 @@ def test_broadcast_block(
     assert fx_other_session.query(Block).get(block.id)
 
 
+def test_broadcast_block_catch_up(
+        fx_app: Flask,
+        fx_session: scoped_session,
+        fx_other_session: Session,
+        fx_other_server: WSGIServer,
+        fx_user: User
+):
+    url = fx_other_server.url
+    fx_session.add(Node(url=url, last_connected_at=datetime.datetime.utcnow()))
+    for _ in range(5):
+        block = Block.create(fx_user, [])
+    fx_session.commit()
+    posted = []
+
+    def post(url, json, **kwargs):
+        posted.append(url)
+        return _post(url, json=json, **kwargs)
+
+    patch = unittest.mock.patch('nekoyume.broadcast.BROADCAST_LIMIT', 2)
+    with unittest.mock.patch('nekoyume.broadcast.post', post), patch, \
+            fx_app.app_context():
+        multicast(
+            serialized=block.serialize(
+                use_bencode=False,
+                include_suffix=True,
+                include_moves=True,
+                include_hash=True
+            ),
+            broadcast=broadcast_block,
+        )
+    # the lagging node catches up with a request per BROADCAST_LIMIT blocks.
+    assert posted == [f'{url}/blocks'] + [f'{url}/blocks/batch'] * 3
+    assert fx_other_session.query(Block).count() == 5
+
+
 @typechecked
 def test_broadcast_block_my_node(fx_session: scoped_session, fx_user: User):
     block = Block.create(fx_user, [])
@@ -211,8 +249,8 @@ def test_broadcast_block_raise_exception(
 
 
 @mark.parametrize('limit, blocks, expected', [
-    (1, 2, 3),
-    (2, 5, 6),
+    (1, 2, 2),
+    (2, 5, 3),
 ])
 def test_broadcast_block_retry(
         fx_session: scoped_session,
@@ -236,13 +274,8 @@ def test_broadcast_block_retry(
                 },
                 'status_code': 403
             },
-            {
-                'json': {
-                    'result': 'success',
-                },
-                'status_code': 200
-            }
         ])
+        m.post('http://test.neko/blocks/batch', json={'result': 'success'})
         multicast(
             serialized=block.serialize(
                 use_bencode=False,
@@ -252,7 +285,11 @@ def test_broadcast_block_retry(
             ),
             broadcast=broadcast_block,
         )
-        assert m.call_count == expected
+        batches = [r.json() for r in m.request_history[1:]]
+        assert len(batches) == expected
+        assert [b['id'] for batch in batches for b in batch] == \
+            list(range(1, blocks + 1))
+        assert all(len(batch) <= limit for batch in batches)
         assert node.last_connected_at > now
 
 
@@ -351,3 +388,197 @@ def broadcast_move_failed(fx_session: scoped_session,
         m.post('http://test.neko', exc=error)
         multicast(serialized=serialized, broadcast=broadcast_move)
     assert node.last_connected_at == now
+
+
+def test_multicast_in_parallel(fx_session: scoped_session):
+    now = datetime.datetime.utcnow()
+    nodes = [Node(url=f'http://{i}.test.neko', last_connected_at=now)
+             for i in range(4)]
+    fx_session.add_all(nodes)
+    fx_session.commit()
+    barrier = threading.Barrier(3, timeout=5)
+    posted = []
+
+    # requests_mock isn't thread-safe, so post() is replaced instead.
+    def post(url, json):
+        posted.append(url)
+        if url.startswith(nodes[3].url):
+            raise Timeout()
+        # every node but the failed one has to be requested at once.
+        barrier.wait()
+
+    with unittest.mock.patch('nekoyume.broadcast.post', post):
+        multicast({'url': 'http://other.neko'}, broadcast=broadcast_node)
+    assert sorted(posted) == [f'{node.url}/nodes' for node in nodes]
+    assert all(node.last_connected_at > now for node in nodes[:3])
+    assert nodes[3].last_connected_at == now
+
+
+def test_multicast_fanout(fx_session: scoped_session):
+    now = datetime.datetime.utcnow()
+    healthy = [Node(url=f'http://{i}.healthy.neko', last_connected_at=now)
+               for i in range(3)]
+    stale = [Node(url=f'http://{i}.stale.neko',
+                  last_connected_at=now - datetime.timedelta(days=1))
+             for i in range(3)]
+    fx_session.add_all(healthy + stale)
+    fx_session.commit()
+    posted = []
+
+    def post(url, json):
+        posted.append(url)
+
+    with unittest.mock.patch('nekoyume.broadcast.post', post), \
+            unittest.mock.patch('nekoyume.broadcast.GOSSIP_FANOUT', 4):
+        multicast({'url': 'http://other.neko'}, broadcast=broadcast_node)
+        assert len(posted) == 4
+        # healthy nodes are picked first.
+        assert {f'{node.url}/nodes' for node in healthy} < set(posted)
+        # the same message isn't relayed again.
+        multicast({'url': 'http://other.neko'}, broadcast=broadcast_node)
+        assert len(posted) == 4
+        multicast({'url': 'http://another.neko'}, broadcast=broadcast_node)
+        assert len(posted) == 8
+
+
+@typechecked
+def test_broadcast_moves(fx_session: scoped_session, fx_user: User,
+                         fx_novice_status: typing.Mapping[str, str]):
+    url = 'http://test.neko'
+    now = datetime.datetime.utcnow()
+    node = Node(url=url, last_connected_at=now)
+    moves = [fx_user.create_novice(fx_novice_status), fx_user.say('hi')]
+    fx_session.add_all([node] + moves)
+    fx_session.commit()
+    with Mocker() as m:
+        m.post('http://test.neko/moves/batch', json={'result': 'success'})
+        serialized = {
+            'moves': [
+                move.serialize(
+                    use_bencode=False,
+                    include_signature=True,
+                    include_id=True,
+                )
+                for move in moves
+            ],
+        }
+        multicast(serialized=serialized, my_node=node,
+                  broadcast=broadcast_moves)
+        assert m.call_count == 1
+        assert m.request_history[0].json() == dict(serialized, sent_node=url)
+        assert node.last_connected_at > now
+
+
+def test_multicast_skips_down_nodes(fx_session: scoped_session):
+    now = datetime.datetime.utcnow()
+    up = Node(url='http://up.neko', last_connected_at=now)
+    down = Node(url='http://down.neko', last_connected_at=now,
+                failure_count=1,
+                retry_at=now + datetime.timedelta(minutes=1))
+    failing = Node(url='http://failing.neko', last_connected_at=now)
+    fx_session.add_all([up, down, failing])
+    fx_session.commit()
+    posted = []
+
+    def post(url, json):
+        posted.append(url)
+        if url.startswith(failing.url):
+            raise ConnectionError()
+
+    with unittest.mock.patch('nekoyume.broadcast.post', post):
+        multicast({'url': 'http://other.neko'}, broadcast=broadcast_node)
+    assert sorted(posted) == ['http://failing.neko/nodes',
+                              'http://up.neko/nodes']
+    assert up.success_count == 1
+    assert up.latency is not None
+    assert failing.down
+    assert failing.failure_count == 1
+    assert down.failure_count == 1
+
+
+def test_broadcast_block_catch_up_without_batch(fx_session: scoped_session,
+                                                fx_user: User):
+    for _ in range(3):
+        block = Block.create(fx_user, [])
+    fx_session.add(Node(url='http://test.neko',
+                        last_connected_at=datetime.datetime.utcnow()))
+    fx_session.commit()
+    patch = unittest.mock.patch('nekoyume.broadcast.BROADCAST_LIMIT', 2)
+    with mock() as m, patch:
+        m.register_uri('POST', 'http://test.neko/blocks', [
+            {'json': {'result': 'failed', 'block_id': 0}, 'status_code': 403},
+            {'json': {'result': 'success'}, 'status_code': 200},
+        ])
+        m.post('http://test.neko/blocks/batch', status_code=404)
+        multicast(
+            serialized=block.serialize(
+                use_bencode=False,
+                include_suffix=True,
+                include_moves=True,
+                include_hash=True
+            ),
+            broadcast=broadcast_block,
+        )
+    # a node without the batch endpoint gets blocks one by one.
+    assert [(r.path, r.json()['id'] if r.path == '/blocks' else None)
+            for r in m.request_history] == [
+        ('/blocks', 3), ('/blocks/batch', None),
+        ('/blocks', 1), ('/blocks', 2), ('/blocks', 3),
+    ]
+
+
+def test_broadcast_block_catch_up_read_timeout(
+        fx_session: scoped_session, fx_user: User
+):
+    for _ in range(3):
+        block = Block.create(fx_user, [])
+    node = Node(url='http://test.neko',
+                last_connected_at=datetime.datetime.utcnow())
+    fx_session.add(node)
+    fx_session.commit()
+    with mock() as m:
+        m.post('http://test.neko/blocks', status_code=403,
+               json={'result': 'failed', 'block_id': 0})
+        m.post('http://test.neko/blocks/batch', exc=ReadTimeout)
+        multicast(
+            serialized=block.serialize(
+                use_bencode=False,
+                include_suffix=True,
+                include_moves=True,
+                include_hash=True
+            ),
+            broadcast=broadcast_block,
+        )
+    assert m.request_history[-1].timeout == (PEER_TIMEOUT, PEER_BULK_TIMEOUT)
+    # a node slow to verify a batch isn't backed off from.
+    assert node.failure_count == 0
+    assert node.success_count == 1
+
+
+def test_broadcast_moves_without_batch(
+        fx_session: scoped_session, fx_user: User,
+        fx_novice_status: typing.Mapping[str, str]
+):
+    url = 'http://test.neko'
+    node = Node(url=url, last_connected_at=datetime.datetime.utcnow())
+    moves = [fx_user.create_novice(fx_novice_status), fx_user.say('hi')]
+    fx_session.add(node)
+    fx_session.commit()
+    serialized = [
+        move.serialize(
+            use_bencode=False,
+            include_signature=True,
+            include_id=True,
+        )
+        for move in moves
+    ]
+    with Mocker() as m:
+        m.post('http://test.neko/moves/batch', status_code=405)
+        m.post('http://test.neko/moves', json={'result': 'success'})
+        multicast(serialized={'moves': serialized}, my_node=node,
+                  broadcast=broadcast_moves)
+        # a node without the batch endpoint gets moves one by one.
+        assert [r.path for r in m.request_history] == \
+            ['/moves/batch', '/moves', '/moves']
+        assert [r.json() for r in m.request_history[1:]] == \
+            [dict(s, sent_node=url) for s in serialized]
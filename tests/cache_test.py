@@ -0,0 +1,17 @@
+import time
+
+from nekoyume.cache import LRUFileSystemCache
+
+
+def test_lru_filesystem_cache(tmpdir):
+    cache = LRUFileSystemCache(str(tmpdir), threshold=3)
+    for key in 'abc':
+        cache.set(key, key)
+        time.sleep(0.01)
+    assert cache.get('a') == 'a'
+    time.sleep(0.01)
+    cache.set('d', 'd')
+    time.sleep(0.01)
+    cache.set('e', 'e')
+    # the least recently used entries are evicted, not the oldest ones.
+    assert [key for key in 'abcde' if cache.get(key)] == ['a', 'd', 'e']
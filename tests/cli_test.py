@@ -0,0 +1,41 @@
+import datetime
+import unittest.mock
+
+from click.testing import CliRunner
+from flask import Flask, _app_ctx_stack
+from sqlalchemy.orm.scoping import scoped_session
+
+from nekoyume.block import Block
+from nekoyume.cli import cli
+from nekoyume.node import Node
+
+
+def test_sync_multicasts_public_url(fx_app: Flask,
+                                    fx_session: scoped_session):
+    fx_session.add(Node(url='http://peer.neko',
+                        last_connected_at=datetime.datetime.utcnow()))
+    fx_session.commit()
+    posted = []
+    # the command runs outside of any app context, as it does in a shell.
+    contexts = []
+    while _app_ctx_stack.top is not None:
+        contexts.append(_app_ctx_stack.top)
+        contexts[-1].pop()
+    try:
+        with unittest.mock.patch('nekoyume.cli.app', fx_app), \
+                unittest.mock.patch('nekoyume.cli.refresh_public_url',
+                                    return_value='http://me.neko'), \
+                unittest.mock.patch('nekoyume.broadcast.post',
+                                    lambda url, json: posted.append(json)), \
+                unittest.mock.patch.object(Node, 'get'), \
+                unittest.mock.patch.object(Node, 'update'), \
+                unittest.mock.patch.object(Block, 'sync'):
+            result = CliRunner().invoke(cli, ['sync'])
+    finally:
+        while _app_ctx_stack.top is not None:
+            _app_ctx_stack.top.pop()
+        for context in reversed(contexts):
+            context.push()
+    assert result.exception is None, result.output
+    assert 'You have a public node url. (http://me.neko)' in result.output
+    assert posted == [{'url': 'http://me.neko'}]
@@ -9,7 +9,7 @@ from sqlalchemy.orm import sessionmaker
 
 from nekoyume.app import create_app
 from nekoyume.orm import db
-from nekoyume.user import User
+from nekoyume.user import User, cache
 
 
 @fixture
@@ -23,6 +23,7 @@ def fx_app():
     }
     app.config['CELERY_ALWAYS_EAGER'] = True
     app.app_context().push()
+    cache.clear()
     return app
 
 
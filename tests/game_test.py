@@ -10,7 +10,6 @@ from typeguard import typechecked
 from nekoyume.block import Block
 from nekoyume.game import get_unconfirmed_move
 from nekoyume.move import Move
-from nekoyume.node import Node
 from nekoyume.user import User
 from nekoyume.util import get_address
 
@@ -141,7 +140,7 @@ def test_get_new_novice_broadcasting(
         fx_test_client: FlaskClient, fx_user: User, fx_private_key: PrivateKey,
         fx_session: scoped_session,
 ):
-    with unittest.mock.patch('nekoyume.game.multicast') as m:
+    with unittest.mock.patch('nekoyume.game.relay_move') as m:
         fx_test_client.post('/login', data={
             'private_key': fx_private_key.to_hex(),
             'name': 'test_user',
@@ -152,20 +151,8 @@ def test_get_new_novice_broadcasting(
             Move.name == 'create_novice',
         ).first()
         assert move
-        serialized = move.serialize(
-            use_bencode=False,
-            include_signature=True,
-            include_id=True,
-        )
-        assert m.called
-        args = m.call_args[1]
-        assert serialized == args['serialized']
-        my_node = args['my_node']
-        assert isinstance(my_node, Node)
-        assert my_node.url == 'http://localhost'
-        broadcast = args['broadcast']
-        assert isinstance(broadcast, typing.Callable)
-        assert broadcast.__name__ == 'broadcast_move'
+        m.assert_called_once_with(move.id, sent_node_url=None,
+                                  my_node_url='http://localhost')
 
 
 @typechecked
@@ -173,7 +160,7 @@ def test_post_move_broadcasting(
         fx_test_client: FlaskClient, fx_user: User, fx_private_key: PrivateKey,
         fx_session: scoped_session,
 ):
-    with unittest.mock.patch('nekoyume.game.multicast') as m:
+    with unittest.mock.patch('nekoyume.game.relay_move') as m:
         fx_test_client.post('/login', data={
             'private_key': fx_private_key.to_hex(),
             'name': 'test_user',
@@ -190,17 +177,5 @@ def test_post_move_broadcasting(
             Move.name == 'hack_and_slash',
         ).first()
         assert move
-        serialized = move.serialize(
-            use_bencode=False,
-            include_signature=True,
-            include_id=True,
-        )
-        assert m.called
-        args = m.call_args[1]
-        assert serialized == args['serialized']
-        my_node = args['my_node']
-        assert isinstance(my_node, Node)
-        assert my_node.url == 'http://localhost'
-        broadcast = args['broadcast']
-        assert isinstance(broadcast, typing.Callable)
-        assert broadcast.__name__ == 'broadcast_move'
+        m.assert_called_once_with(move.id, sent_node_url=None,
+                                  my_node_url='http://localhost')
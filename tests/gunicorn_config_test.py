@@ -0,0 +1,11 @@
+import unittest.mock
+
+from nekoyume.gunicorn_config import post_worker_init
+
+
+def test_post_worker_init():
+    with unittest.mock.patch(
+        'nekoyume.gunicorn_config.start_public_url_refresher'
+    ) as start:
+        post_worker_init(unittest.mock.Mock())
+    start.assert_called_once_with()
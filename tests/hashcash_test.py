@@ -1,9 +1,18 @@
 import hashlib
 import os
+import threading
+import time
+import unittest.mock
 
 from pytest import mark
 
-from nekoyume.hashcash import check, has_leading_zero_bits, _mint
+from nekoyume.hashcash import (
+    check,
+    has_leading_zero_bits,
+    _answer,
+    _mint,
+    _search,
+)
 
 
 @mark.parametrize('challenge', [os.urandom(40) for _ in range(5)])
@@ -31,3 +40,36 @@ def test_has_leading_zero_bits():
     assert f(b'\0\x7f', 9)
     assert not f(b'\0\x7f', 10)
     assert f(b'\0?', 10)
+
+
+@mark.parametrize('challenge', [os.urandom(40) for _ in range(3)])
+@mark.parametrize('bits', [4, 12, 20])
+def test_mint_parallel(challenge, bits):
+    with unittest.mock.patch('nekoyume.hashcash.MINT_CHUNK_SIZE', 2 ** 10):
+        assert _mint(challenge, bits, workers=3) == _mint(challenge, bits)
+
+
+@mark.parametrize('start, stop', [(1, 2000), (300, 70000), (65535, 65600)])
+def test_search(start, stop):
+    challenge = os.urandom(40)
+    for bits in range(0, 9, 2):
+        expected = next(
+            (counter for counter in range(start, stop)
+             if has_leading_zero_bits(
+                 hashlib.sha256(challenge + _answer(counter)).digest(), bits
+             )),
+            None
+        )
+        assert _search(challenge, bits, start, stop) == expected
+    assert _search(challenge, 257, start, stop) is None
+
+
+@mark.parametrize('workers', [1, 2])
+def test_mint_cancel(workers: int):
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+    assert _mint(b'foo', 256, workers=workers, cancel=cancel) is None
+    assert _mint(b'foo', 256, workers=workers,
+                 deadline=time.time() + 0.2) is None
+    assert _mint(b'foo', 16, workers=workers, cancel=threading.Event(),
+                 deadline=time.time() + 60) == b'-g'
@@ -1,7 +1,11 @@
+import time
 import typing
+import unittest.mock
 
 from coincurve import PrivateKey
 from pytest import fixture, raises
+from requests.exceptions import ConnectionError
+from requests_mock import Mocker
 
 from nekoyume.block import Block
 from nekoyume.exc import InvalidMoveError
@@ -11,7 +15,14 @@ from nekoyume.move import (
     LevelUp,
     Move,
     Say,
+    Send,
     Sleep,
+    get_my_public_url,
+    get_verify_executor,
+    resolve_public_url,
+    start_public_url_refresher,
+    verified_moves,
+    verify_moves,
 )
 from nekoyume.user import User
 
@@ -112,3 +123,90 @@ def test_ensure_block_raise_invalid_move_error():
 
     with raises(InvalidMoveError):
         InvalidMove().execute()
+
+
+def test_send_receiver(fx_user: User, fx_user2: User,
+                       fx_novice_status: typing.Mapping[str, str]):
+    move = fx_user.move(Send(details={
+        'item_index': '0',
+        'amount': '1',
+        'receiver': fx_user2.address,
+    }))
+    assert move.receiver == fx_user2.address
+    assert Move.query.filter_by(receiver=fx_user2.address).one() is move
+    move = fx_user.say('hi')
+    assert move.receiver is None
+
+
+def test_verify_moves_in_parallel(fx_user: User):
+    moves = [fx_user.move(Say(details={'content': f'hi {i}'}), commit=False)
+             for i in range(6)]
+    moves[2].tax = 1
+    moves[4].signature = None
+    expected = [True, True, False, True, False, True]
+    assert verify_moves(moves) == expected
+    patch_workers = unittest.mock.patch('nekoyume.move.VERIFY_WORKERS', 2)
+    patch_threshold = unittest.mock.patch(
+        'nekoyume.move.PARALLEL_VERIFY_THRESHOLD', 1
+    )
+    with patch_workers, patch_threshold:
+        get_verify_executor.cache_clear()
+        verified_moves.clear()
+        try:
+            # request handlers verify moves serially.
+            assert verify_moves(moves) == expected
+            assert get_verify_executor.cache_info().currsize == 0
+            assert verify_moves(moves, parallel=True) == expected
+            assert get_verify_executor.cache_info().currsize == 1
+            assert len(verified_moves) == 4
+        finally:
+            get_verify_executor().shutdown()
+            get_verify_executor.cache_clear()
+
+
+def test_verified_moves_cache(fx_user: User):
+    moves = [fx_user.move(Say(details={'content': f'hi {i}'}), commit=False)
+             for i in range(2)]
+    assert all((m.id, m.signature) in verified_moves for m in moves)
+    with unittest.mock.patch('nekoyume.move.PublicKey') as public_key:
+        assert moves[0].valid
+        assert verify_moves(moves) == [True, True]
+        assert not public_key.called
+    moves[0].tax = 1
+    assert not moves[0].valid
+    with unittest.mock.patch('nekoyume.move.VERIFIED_MOVES_CACHE_SIZE', 1):
+        move = fx_user.move(Say(details={'content': 'hi'}), commit=False)
+    assert list(verified_moves) == [(move.id, move.signature)]
+
+
+def test_resolve_public_url(monkeypatch):
+    monkeypatch.delenv('PUBLIC_URL', raising=False)
+    monkeypatch.setenv('PORT', '5000')
+    with Mocker() as m:
+        m.get('http://1.2.3.4:5000/ping', text='pong')
+        assert resolve_public_url(lambda: '1.2.3.4') == 'http://1.2.3.4:5000'
+        m.get('http://1.2.3.4:5000/ping', exc=ConnectionError)
+        assert resolve_public_url(lambda: '1.2.3.4') is None
+    monkeypatch.setenv('PUBLIC_URL', 'http://test.neko')
+    assert resolve_public_url(lambda: '1.2.3.4') == 'http://test.neko'
+
+
+def test_get_my_public_url(monkeypatch):
+    monkeypatch.delenv('PUBLIC_URL', raising=False)
+    resolver = unittest.mock.Mock(return_value='http://test.neko')
+
+    def wait_for(url):
+        deadline = time.monotonic() + 5
+        while get_my_public_url() != url and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return get_my_public_url()
+
+    start_public_url_refresher(resolver)
+    assert wait_for('http://test.neko') == 'http://test.neko'
+    calls = resolver.call_count
+    # it's served from memory until the next refresh.
+    for _ in range(10):
+        assert get_my_public_url() == 'http://test.neko'
+    assert resolver.call_count == calls
+    start_public_url_refresher(lambda: None)
+    assert wait_for(None) is None
@@ -1,8 +1,14 @@
+import datetime
+import threading
+import unittest.mock
+
 from pytest_localserver.http import WSGIServer
+from requests.exceptions import ConnectionError
+from requests_mock import Mocker
 from sqlalchemy.orm.scoping import scoped_session
 from typeguard import typechecked
 
-from nekoyume.node import Node
+from nekoyume.node import DISCOVERY_TIMEOUT, Node
 
 
 @typechecked
@@ -11,3 +17,120 @@ def test_node(fx_server: WSGIServer, fx_session: scoped_session):
     assert Node.get(fx_server.url, session=fx_session)
     assert Node.get(fx_server.url, session=fx_session).url == fx_server.url
     assert Node.get(fx_server.url, session=fx_session).last_connected_at
+
+
+def test_node_health(fx_session: scoped_session):
+    node = Node(url='http://test.neko',
+                last_connected_at=datetime.datetime.utcnow())
+    fx_session.add(node)
+    fx_session.commit()
+    assert not node.down
+    assert fx_session.query(Node).filter(~Node.down).all() == [node]
+    with unittest.mock.patch('nekoyume.node.NODE_BACKOFF_MAX', 30):
+        backoffs = []
+        for _ in range(4):
+            node.record_failure()
+            backoffs.append(node.retry_at - datetime.datetime.utcnow())
+    # it backs off exponentially up to the limit.
+    assert [round(b.total_seconds()) for b in backoffs] == [10, 20, 30, 30]
+    fx_session.commit()
+    assert node.down
+    assert fx_session.query(Node).filter(Node.down).all() == [node]
+    node.record_success(1.0)
+    node.record_success(2.0)
+    assert not node.down
+    assert node.failure_count == 0
+    assert node.success_count == 2
+    assert node.latency == 1.3
+
+
+def test_node_record_many(fx_session: scoped_session):
+    now = datetime.datetime.utcnow()
+    nodes = [Node(url=f'http://{i}.test.neko', last_connected_at=now,
+                  failure_count=failure_count, latency=1.0 if i else None)
+             for i, failure_count in enumerate([0, 2, 1, 3])]
+    fx_session.add_all(nodes)
+    fx_session.commit()
+    with unittest.mock.patch('nekoyume.node.NODE_BACKOFF_MAX', 30), \
+            unittest.mock.patch.object(fx_session, 'query',
+                                       wraps=fx_session.query) as query:
+        Node.record_many({nodes[0].url: 2.0, nodes[1].url: 2.0,
+                          nodes[2].url: None, nodes[3].url: None},
+                         fx_session)
+    # an UPDATE for successful nodes and another for failed ones.
+    assert query.call_count == 2
+    fx_session.commit()
+    assert [(n.success_count, n.failure_count, n.latency) for n in nodes] == [
+        (1, 0, 2.0), (1, 0, 1.3), (0, 2, 1.0), (0, 4, 1.0),
+    ]
+    assert not nodes[0].down and not nodes[1].down
+    assert [round((n.retry_at - now).total_seconds()) for n in nodes[2:]] == \
+        [20, 30]
+    assert nodes[0].last_connected_at > now
+
+
+def test_node_update_down(fx_session: scoped_session):
+    node = Node(url='http://test.neko',
+                last_connected_at=datetime.datetime.utcnow())
+    fx_session.add(node)
+    fx_session.commit()
+    with Mocker() as m:
+        m.get('http://test.neko/nodes', exc=ConnectionError)
+        Node.update(node)
+        assert node.down
+        assert m.call_count == 1
+        # nodes being backed off from aren't requested.
+        Node.update(node)
+        assert m.call_count == 1
+    assert fx_session.query(Node).get(node.url).failure_count == 1
+
+
+def test_node_update_discovers_concurrently(fx_session: scoped_session):
+    now = datetime.datetime.utcnow()
+    seed = Node(url='http://seed.neko', last_connected_at=now)
+    known = Node(url='http://known.neko', last_connected_at=now)
+    fx_session.add_all([seed, known])
+    fx_session.commit()
+    urls = ['http://a.neko', 'http://b.neko', 'http://c.neko']
+    barrier = threading.Barrier(len(urls), timeout=5)
+    pinged = []
+
+    # requests_mock isn't thread-safe, so get() is replaced instead.
+    def get(url, **kwargs):
+        if url == f'{seed.url}/nodes':
+            return unittest.mock.Mock(
+                elapsed=datetime.timedelta(seconds=0.1),
+                json=lambda: {'nodes': urls + [known.url, urls[0]]},
+            )
+        pinged.append(url)
+        assert kwargs['timeout'] == DISCOVERY_TIMEOUT
+        # every unknown node has to be pinged at once.
+        barrier.wait()
+        if url.startswith(urls[1]):
+            raise ConnectionError()
+        text = 'pong' if url.startswith(urls[0]) else 'nope'
+        return unittest.mock.Mock(text=text,
+                                  elapsed=datetime.timedelta(seconds=0.2))
+
+    with unittest.mock.patch('nekoyume.node.get', get):
+        Node.update(seed)
+    assert sorted(pinged) == [f'{url}/ping' for url in urls]
+    assert {n.url for n in fx_session.query(Node)} == \
+        {seed.url, known.url, urls[0]}
+    node = fx_session.query(Node).get(urls[0])
+    assert node.last_connected_at > now
+    assert node.latency == 0.2
+    assert seed.success_count == 1
+
+
+def test_node_insert_many(fx_session: scoped_session):
+    now = datetime.datetime.utcnow()
+    fx_session.add(Node(url='http://a.neko', last_connected_at=now))
+    fx_session.commit()
+    Node.insert_many([
+        {'url': 'http://a.neko', 'last_connected_at': now},
+        {'url': 'http://b.neko', 'last_connected_at': now},
+    ])
+    assert sorted(n.url for n in fx_session.query(Node)) == \
+        ['http://a.neko', 'http://b.neko']
+    assert fx_session.query(Node).get('http://b.neko').failure_count == 0
@@ -0,0 +1,49 @@
+import threading
+import unittest.mock
+
+from pytest_localserver.http import WSGIServer
+from requests_mock import Mocker
+
+from nekoyume.peer import (
+    PEER_HOSTS,
+    PEER_POOL_SIZE,
+    PEER_TIMEOUT,
+    get,
+    get_adapter,
+    get_session,
+    post,
+)
+
+
+def test_get_session():
+    session = get_session()
+    assert get_session() is session
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(get_session()))
+    thread.start()
+    thread.join()
+    assert sessions[0] is not session
+    assert sessions[0].adapters['http://'] is session.adapters['http://']
+    with unittest.mock.patch('os.getpid', return_value=-1):
+        assert get_adapter() is not session.adapters['http://']
+        assert get_session() is not session
+
+
+def test_keep_alive(fx_server: WSGIServer):
+    assert get(f'{fx_server.url}/ping').text == 'pong'
+    pool = get_adapter().poolmanager.connection_from_url(fx_server.url)
+    assert pool.num_connections == 1
+    assert get(f'{fx_server.url}/ping').text == 'pong'
+    assert pool.num_connections == 1
+    # it keeps PEER_POOL_SIZE connections for each of PEER_HOSTS peers.
+    assert pool.pool.maxsize == PEER_POOL_SIZE
+    assert get_adapter().poolmanager.pools._maxsize == PEER_HOSTS
+
+
+def test_timeout():
+    with Mocker() as m:
+        m.get('http://test.neko/ping', text='pong')
+        m.post('http://test.neko/nodes', json={'result': 'success'})
+        get('http://test.neko/ping')
+        post('http://test.neko/nodes', json={}, timeout=1)
+        assert [r.timeout for r in m.request_history] == [PEER_TIMEOUT, 1]
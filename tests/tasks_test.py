@@ -1,11 +1,19 @@
+import datetime
+import time
 import typing
 import unittest.mock
 
+from flask import Flask
 from sqlalchemy.orm.scoping import scoped_session
 
 from nekoyume.block import Block
 from nekoyume.node import Node
-from nekoyume.tasks import block_broadcast, move_broadcast
+from nekoyume.tasks import (
+    block_broadcast,
+    block_sync,
+    moves_broadcast,
+    relay_move,
+)
 from nekoyume.user import User
 
 
@@ -46,38 +54,49 @@ def test_block_broadcast_no_block(fx_session: scoped_session):
         assert not m.called
 
 
-def test_move_broadcast(fx_session: scoped_session,
-                        fx_user: User,
-                        fx_novice_status: typing.Mapping[str, str]):
-    move = fx_user.create_novice(fx_novice_status)
-    fx_session.add(move)
+def test_block_sync(fx_session: scoped_session):
+    node = Node(url='http://localhost:5000',
+                last_connected_at=datetime.datetime.utcnow())
+    fx_session.add(node)
     fx_session.commit()
-    with unittest.mock.patch('nekoyume.tasks.multicast') as m:
-        move_broadcast(move.id,
-                       'http://localhost:5000',
-                       'http://localhost:5001',
-                       session=fx_session)
-        serialized = move.serialize(
-            use_bencode=False,
-            include_signature=True,
-            include_id=True,
-        )
-        assert m.called
-        args = m.call_args[1]
-        assert serialized == args['serialized']
-        assert isinstance(args['sent_node'], Node)
-        assert args['sent_node'].url == 'http://localhost:5000'
-        assert isinstance(args['my_node'], Node)
-        assert args['my_node'].url == 'http://localhost:5001'
-        broadcast = args['broadcast']
-        assert isinstance(broadcast, typing.Callable)
-        assert broadcast.__name__ == 'broadcast_move'
+    with unittest.mock.patch.object(Block, 'sync') as sync:
+        block_sync(session=fx_session)
+    sync.assert_called_once_with(node, fx_session, parallel=False)
 
 
-def test_move_broadcast_no_move(fx_session: scoped_session):
-    with unittest.mock.patch('nekoyume.tasks.multicast') as m:
-        move_broadcast(0,
-                       'http://localhost:5000',
-                       'http://localhost:5001',
-                       session=fx_session)
-        assert not m.called
+def test_moves_broadcast(fx_session: scoped_session, fx_user: User,
+                         fx_novice_status: typing.Mapping[str, str]):
+    moves = [fx_user.create_novice(fx_novice_status),
+             fx_user.say('hi'), fx_user.say('bye')]
+    patch = unittest.mock.patch('nekoyume.tasks.BROADCAST_LIMIT', 2)
+    with unittest.mock.patch('nekoyume.tasks.multicast') as m, patch:
+        moves_broadcast([move.id for move in moves],
+                        'http://localhost:5000',
+                        'http://localhost:5001',
+                        session=fx_session)
+    # moves are sent in bundles of BROADCAST_LIMIT.
+    assert m.call_count == 2
+    bundles = [args[1]['serialized']['moves'] for args in m.call_args_list]
+    assert sorted(m['id'] for bundle in bundles for m in bundle) == \
+        sorted(move.id for move in moves)
+    assert m.call_args[1]['sent_node'].url == 'http://localhost:5000'
+    assert m.call_args[1]['my_node'].url == 'http://localhost:5001'
+    assert m.call_args[1]['broadcast'].__name__ == 'broadcast_moves'
+
+
+def test_relay_move(fx_app: Flask):
+    delay = unittest.mock.Mock()
+    with unittest.mock.patch('nekoyume.tasks.moves_broadcast.delay', delay), \
+            unittest.mock.patch('nekoyume.tasks.MOVE_RELAY_WINDOW', 0.2):
+        for move_id in 'abc':
+            relay_move(move_id, None, 'http://localhost:5001')
+        relay_move('d', 'http://localhost:5000', 'http://localhost:5001')
+        assert not delay.called
+        deadline = time.monotonic() + 5
+        while delay.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    # moves in the window are relayed at once.
+    assert delay.call_count == 2
+    delay.assert_any_call(['a', 'b', 'c'], None, 'http://localhost:5001')
+    delay.assert_any_call(['d'], 'http://localhost:5000',
+                          'http://localhost:5001')
@@ -0,0 +1,186 @@
+import typing
+import unittest.mock
+
+from coincurve import PrivateKey
+from sqlalchemy import event
+from sqlalchemy.orm.scoping import scoped_session
+
+from nekoyume.block import Block
+from nekoyume.move import Send
+from nekoyume.user import Avatar, AvatarSnapshot, User
+
+
+def create_block(user: User, moves) -> Block:
+    """Create a block without materializing avatars."""
+    block = Block.create(user, moves, commit=False)
+    user.session.add(block)
+    user.session.commit()
+    return block
+
+
+def test_avatar_snapshot(fx_user: User, fx_session: scoped_session,
+                         fx_novice_status: typing.Mapping[str, str]):
+    move = fx_user.create_novice(fx_novice_status)
+    create_block(fx_user, [move])
+    for i in range(3):
+        move = fx_user.say(f'hi {i}')
+        create_block(fx_user, [move])
+    block = create_block(fx_user, [])
+    with unittest.mock.patch('nekoyume.user.AVATAR_SNAPSHOT_INTERVAL', 2):
+        avatar = Avatar.replay(fx_user.address, block.id, fx_session)
+    snapshot = fx_session.query(AvatarSnapshot).filter_by(
+        user_address=fx_user.address
+    ).one()
+    assert snapshot.block_id == block.id
+    assert snapshot.load(avatar.current_block) == avatar
+
+    move = fx_user.sleep()
+    next_block = create_block(fx_user, [move])
+    with unittest.mock.patch.object(AvatarSnapshot, 'load',
+                                    wraps=snapshot.load) as load:
+        next_avatar = Avatar.replay(fx_user.address, next_block.id,
+                                    fx_session)
+        assert load.called
+    assert next_avatar.gold == avatar.gold + 8
+    assert next_avatar.name == avatar.name
+
+
+def test_avatar_snapshot_materialize(
+        fx_user: User, fx_session: scoped_session,
+        fx_novice_status: typing.Mapping[str, str]
+):
+    move = fx_user.create_novice(fx_novice_status)
+    block = Block.create(fx_user, [move])
+    Block.create(fx_user, [])
+    move = fx_user.say('hi')
+    last_block = Block.create(fx_user, [move])
+    snapshots = fx_session.query(AvatarSnapshot).filter_by(
+        user_address=fx_user.address
+    ).order_by(AvatarSnapshot.block_id)
+    assert [s.block_id for s in snapshots] == \
+        [block.id, block.id + 1, last_block.id]
+    with unittest.mock.patch.object(Avatar, 'get') as get:
+        avatar = snapshots[-1].load(block)
+        assert not get.called
+    assert avatar.gold == 3 * 8
+    assert avatar == Avatar.replay(fx_user.address, last_block.id,
+                                   fx_session)
+
+
+def test_avatar_snapshot_materialize_send(
+        fx_user: User, fx_session: scoped_session,
+        fx_novice_status: typing.Mapping[str, str]
+):
+    receiver = User(PrivateKey())
+    receiver.session = fx_session
+    Block.create(fx_user, [fx_user.create_novice(fx_novice_status)])
+    Block.create(receiver, [receiver.create_novice(fx_novice_status)])
+    move = fx_user.move(Send(details={
+        'item_index': '0',
+        'amount': '1',
+        'receiver': receiver.address,
+    }))
+    block = Block.create(fx_user, [move])
+    assert block.id == fx_session.query(Block).count()
+    assert fx_session.query(AvatarSnapshot).filter_by(
+        user_address=receiver.address, block_id=block.id
+    ).count() == 1
+
+
+def test_avatar_snapshot_materialize_error(
+        fx_user: User, fx_session: scoped_session,
+        fx_novice_status: typing.Mapping[str, str]
+):
+    move = fx_user.create_novice(fx_novice_status)
+    with unittest.mock.patch.object(Avatar, 'replay',
+                                    side_effect=KeyError('item_name')):
+        block = Block.create(fx_user, [move])
+    assert fx_session.query(Block).get(block.id) is block
+    assert not fx_session.query(AvatarSnapshot).count()
+
+
+def test_avatar_snapshot_truncate(fx_user: User, fx_session: scoped_session,
+                                  fx_novice_status: typing.Mapping[str, str]):
+    move = fx_user.create_novice(fx_novice_status)
+    block = Block.create(fx_user, [move])
+    avatar = fx_user.avatar(block.id)
+    AvatarSnapshot.store(avatar, block.id, fx_session)
+    AvatarSnapshot.store(avatar, block.id + 1, fx_session)
+    AvatarSnapshot.truncate(block.id, fx_session)
+    assert [s.block_id for s in fx_session.query(AvatarSnapshot)] == \
+        [block.id]
+
+
+def test_avatar_snapshot_limit(fx_user: User, fx_session: scoped_session,
+                               fx_novice_status: typing.Mapping[str, str]):
+    move = fx_user.create_novice(fx_novice_status)
+    block = create_block(fx_user, [move])
+    avatar = fx_user.avatar(block.id)
+    with unittest.mock.patch('nekoyume.user.AVATAR_SNAPSHOT_LIMIT', 2):
+        for i in range(4):
+            AvatarSnapshot.store(avatar, block.id + i, fx_session)
+    assert [s.block_id for s in fx_session.query(AvatarSnapshot).order_by(
+        AvatarSnapshot.block_id
+    )] == [block.id + 2, block.id + 3]
+
+
+def test_avatar_replay_does_not_commit(
+        fx_user: User, fx_session: scoped_session,
+        fx_novice_status: typing.Mapping[str, str]
+):
+    move = fx_user.create_novice(fx_novice_status)
+    create_block(fx_user, [move])
+    move = fx_user.say('hi')
+    block = create_block(fx_user, [move])
+    with unittest.mock.patch('nekoyume.user.AVATAR_SNAPSHOT_INTERVAL', 1), \
+            unittest.mock.patch.object(fx_session, 'commit') as commit:
+        Avatar.replay(fx_user.address, block.id, fx_session)
+    assert not commit.called
+    assert fx_session.query(AvatarSnapshot).filter_by(
+        block_id=block.id
+    ).count() == 1
+
+
+def test_avatar_get_query_count(fx_user: User, fx_session: scoped_session,
+                                fx_novice_status: typing.Mapping[str, str]):
+    move = fx_user.create_novice(fx_novice_status)
+    create_block(fx_user, [move])
+    for i in range(5):
+        move = fx_user.say(f'hi {i}')
+        create_block(fx_user, [move])
+    move = fx_user.sleep()
+    block = create_block(fx_user, [move])
+    fx_session.expire_all()
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = fx_session.get_bind()
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        assert Avatar.replay(fx_user.address, block.id, fx_session)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert len(statements) <= 8
+
+
+def test_avatar_cache(fx_user: User, fx_session: scoped_session,
+                      fx_novice_status: typing.Mapping[str, str]):
+    other_user = User(PrivateKey())
+    other_user.session = fx_session
+    move = fx_user.create_novice(fx_novice_status)
+    block = Block.create(fx_user, [move])
+    other_block = Block.create(other_user, [])
+    move = fx_user.sleep()
+    last_block = Block.create(fx_user, [move])
+    with unittest.mock.patch.object(Avatar, 'replay',
+                                    wraps=Avatar.replay) as replay:
+        avatar = Avatar.get(fx_user.address, block.id, fx_session)
+        assert replay.call_count == 1
+        assert avatar == Avatar.get(fx_user.address, other_block.id,
+                                    fx_session)
+        assert replay.call_count == 1
+        assert avatar != Avatar.get(fx_user.address, last_block.id,
+                                    fx_session)
+        assert replay.call_count == 2
@@ -1,9 +1,10 @@
 import datetime
+import threading
 
 from coincurve import PublicKey
-from pytest import mark
+from pytest import mark, raises
 
-from nekoyume.util import deserialize_datetime, get_address
+from nekoyume.util import deserialize_datetime, get_address, prefetch
 
 
 def test_get_address():
@@ -24,3 +25,23 @@ def test_get_address():
 ])
 def test_deserialized_datetime(time, expected):
     assert deserialize_datetime(time) == expected
+
+
+def test_prefetch():
+    ahead = threading.Event()
+
+    def produce():
+        for i in range(5):
+            if i == 2:
+                ahead.set()
+            yield i
+        raise ValueError
+
+    items = prefetch(produce(), size=2)
+    assert next(items) == 0
+    # the producer runs ahead of the consumer by the size.
+    assert ahead.wait(5)
+    assert list(zip(range(3), items)) == [(0, 1), (1, 2), (2, 3)]
+    assert next(items) == 4
+    with raises(ValueError):
+        next(items)